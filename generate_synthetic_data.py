@@ -0,0 +1,297 @@
+"""
+Synthetic data generator for the nKPI source schema.
+
+Produces posthogevents, PLEvent, PLEventGuest, Project, Team and Member rows at a
+configurable multiple of today's volume (--scale 1 is roughly production size),
+bulk-loads them into Postgres with COPY and/or writes one Parquet file per table:
+
+    python generate_synthetic_data.py --scale 10 --db-url postgresql://localhost/nkpi
+    python generate_synthetic_data.py --scale 100 --parquet-dir synthetic/
+
+posthogevents is generated and written in chunks of sessions, so memory stays flat
+regardless of scale. The same --seed always produces the same rows.
+"""
+import argparse
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nkpi_schema.sql")
+
+# Row counts at --scale 1
+BASE_ROWS = {
+    "Member": 5000,
+    "Team": 1500,
+    "Project": 400,
+    "PLEvent": 150,
+    "sessions": 60000,
+}
+GUESTS_PER_EVENT = 40
+EVENTS_PER_SESSION = 12
+SESSION_CHUNK_SIZE = 20000
+EVENT_GAP_SECONDS = 30
+
+START = pd.Timestamp("2022-01-01")
+END = pd.Timestamp("2025-06-30")
+
+PAGE_EVENTS = ["$pageview", "$pageleave", "$autocapture"]
+OFFICE_HOURS_EVENTS = [
+    "irl-guest-list-table-office-hours-link-clicked",
+    "member-officehours-clicked",
+    "team-officehours-clicked",
+]
+OFFICE_HOURS_RATE = 0.01
+MISSING_SENT_AT_RATE = 0.02
+PATHNAMES = ["/", "/members", "/teams", "/projects", "/irl", "/events"]
+
+# Share of sessions per identity: anonymous guest, or a member named through
+# userName, loggedInUserName or the nested user.name property.
+IDENTITY_SHARES = [0.4, 0.35, 0.15, 0.1]
+
+COLUMNS = {
+    "posthogevents": ["id", "event", "timestamp", "distinct_id", "properties"],
+    "Member": ["uid", "name", "createdAt", "updatedAt"],
+    "Team": ["uid", "name", "createdAt", "updatedAt"],
+    "Project": ["uid", "name", "isDeleted", "createdAt", "updatedAt"],
+    "PLEvent": ["uid", "name", "startDate", "endDate", "createdAt", "updatedAt"],
+    "PLEventGuest": ["uid", "eventUid", "memberUid", "teamUid", "isHost", "isSpeaker", "createdAt", "updatedAt"],
+}
+
+
+def growth_timestamps(rng, n, start=START, end=END):
+    """n timestamps in [start, end) whose density grows linearly, like a growing network."""
+    position = np.sqrt(rng.random(n))
+    return pd.to_datetime(start.value + (position * (end - start).value).astype("int64"))
+
+
+def uids(prefix, n):
+    return prefix + "-" + pd.Series(np.arange(n)).astype(str)
+
+
+def generate_entities(rng, table, n, deleted_rate=None):
+    created = growth_timestamps(rng, n)
+    df = pd.DataFrame({
+        "uid": uids(table.lower(), n),
+        "name": f"{table} " + pd.Series(np.arange(n)).astype(str),
+        "createdAt": created,
+        "updatedAt": created + pd.to_timedelta(rng.exponential(30, n), unit="D"),
+    })
+    if deleted_rate is not None:
+        df.insert(2, "isDeleted", rng.random(n) < deleted_rate)
+    return df
+
+
+def generate_events(rng, n):
+    start = growth_timestamps(rng, n)
+    return pd.DataFrame({
+        "uid": uids("event", n),
+        "name": "Event " + pd.Series(np.arange(n)).astype(str),
+        "startDate": start,
+        "endDate": start + pd.to_timedelta(rng.integers(1, 4, n), unit="D"),
+        "createdAt": start - pd.to_timedelta(rng.integers(14, 90, n), unit="D"),
+        "updatedAt": start,
+    })
+
+
+def generate_guests(rng, events, members, teams):
+    per_event = rng.poisson(GUESTS_PER_EVENT, len(events))
+    event_index = np.repeat(np.arange(len(events)), per_event)
+    n = len(event_index)
+    role = rng.random(n)
+    team_uids = teams["uid"].to_numpy()[rng.integers(0, len(teams), n)].astype(object)
+    team_uids[rng.random(n) < 0.1] = None
+    created = events["createdAt"].to_numpy()[event_index]
+    return pd.DataFrame({
+        "uid": uids("guest", n),
+        "eventUid": events["uid"].to_numpy()[event_index],
+        "memberUid": members["uid"].to_numpy()[rng.integers(0, len(members), n)],
+        "teamUid": team_uids,
+        "isHost": role < 0.05,
+        "isSpeaker": (role >= 0.05) & (role < 0.15),
+        "createdAt": created,
+        "updatedAt": created,
+    })
+
+
+def event_properties(rng, session_ids, identity, names, member_uids, team_uids, events, timestamps):
+    """Builds the JSON properties of each event the way PostHog and the directory app send them."""
+    sent_at = (timestamps + pd.to_timedelta(rng.integers(0, 2000, len(timestamps)), unit="ms")).strftime(
+        "%Y-%m-%dT%H:%M:%S.%f"
+    )
+    sent_at_missing = rng.random(len(timestamps)) < MISSING_SENT_AT_RATE
+    pathnames = np.array(PATHNAMES, dtype=object)[rng.integers(0, len(PATHNAMES), len(timestamps))]
+
+    properties = []
+    for session_id, kind, name, member_uid, team_uid, event, sent, missing, pathname in zip(
+        session_ids, identity, names, member_uids, team_uids, events, sent_at, sent_at_missing, pathnames
+    ):
+        props = {"$session_id": session_id, "$sent_at": "" if missing else sent[:-3] + "Z"}
+        if kind == 1:
+            props["userName"] = name
+            props["userUid"] = member_uid
+        elif kind == 2:
+            props["loggedInUserName"] = name
+            props["loggedInUserUid"] = member_uid
+        elif kind == 3:
+            props["user"] = {"name": name, "uid": member_uid}
+        if event == "member-officehours-clicked":
+            props["memberUid"] = member_uid
+            pathname = f"/members/{member_uid}"
+        elif event == "team-officehours-clicked":
+            pathname = f"/teams/{team_uid}"
+        props["$pathname"] = pathname
+        props["$current_url"] = "https://directory.plnetwork.io" + pathname
+        properties.append(json.dumps(props))
+    return properties
+
+
+def generate_posthog_chunks(rng, sessions, members, teams):
+    """Yields posthogevents frames, SESSION_CHUNK_SIZE sessions at a time."""
+    next_id = 1
+    member_names = members["name"].to_numpy()
+    member_uids = members["uid"].to_numpy()
+    team_uids = teams["uid"].to_numpy()
+    for first in range(0, sessions, SESSION_CHUNK_SIZE):
+        n = min(SESSION_CHUNK_SIZE, sessions - first)
+        lengths = rng.geometric(1 / EVENTS_PER_SESSION, n)
+        session_index = np.repeat(np.arange(n), lengths)
+        total = len(session_index)
+
+        first_event = np.cumsum(lengths) - lengths
+        gaps = rng.exponential(EVENT_GAP_SECONDS, total)
+        gaps[first_event] = 0
+        running = np.cumsum(gaps)
+        elapsed = running - np.repeat(running[first_event], lengths)
+        timestamps = growth_timestamps(rng, n)[session_index] + pd.to_timedelta(elapsed, unit="s")
+
+        identity = rng.choice(len(IDENTITY_SHARES), n, p=IDENTITY_SHARES)[session_index]
+        member = rng.integers(0, len(members), n)[session_index]
+        team = rng.integers(0, len(teams), n)[session_index]
+        session_ids = ("session-" + pd.Series(np.arange(first, first + n)).astype(str)).to_numpy()[session_index]
+
+        events = np.array(PAGE_EVENTS, dtype=object)[rng.integers(0, len(PAGE_EVENTS), total)]
+        office_hours = rng.random(total) < OFFICE_HOURS_RATE
+        events[office_hours] = np.array(OFFICE_HOURS_EVENTS, dtype=object)[
+            rng.integers(0, len(OFFICE_HOURS_EVENTS), office_hours.sum())
+        ]
+
+        yield pd.DataFrame({
+            "id": np.arange(next_id, next_id + total),
+            "event": events,
+            "timestamp": timestamps.tz_localize("UTC"),
+            "distinct_id": session_ids,
+            "properties": event_properties(
+                rng, session_ids, identity, member_names[member], member_uids[member], team_uids[team], events, timestamps
+            ),
+        })
+        next_id += total
+
+
+def generate_dataset(scale=1.0, seed=0):
+    """
+    Yields (table, DataFrame) pairs for every source table at `scale` times BASE_ROWS.
+
+    posthogevents arrives as several chunks; every other table as a single frame.
+    """
+    rng = np.random.default_rng(seed)
+    rows = {table: max(1, int(count * scale)) for table, count in BASE_ROWS.items()}
+
+    members = generate_entities(rng, "Member", rows["Member"])
+    teams = generate_entities(rng, "Team", rows["Team"])
+    events = generate_events(rng, rows["PLEvent"])
+    yield "Member", members
+    yield "Team", teams
+    yield "Project", generate_entities(rng, "Project", rows["Project"], deleted_rate=0.05)
+    yield "PLEvent", events
+    yield "PLEventGuest", generate_guests(rng, events, members, teams)
+    for chunk in generate_posthog_chunks(rng, rows["sessions"], members, teams):
+        yield "posthogevents", chunk
+
+
+def copy_frame(cursor, table, df):
+    buffer = io.StringIO()
+    df[COLUMNS[table]].to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ", ".join(f'"{column}"' for column in COLUMNS[table])
+    cursor.copy_expert(f'COPY public."{table}" ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def load_postgres(engine, dataset):
+    """Creates nkpi_schema.sql and bulk-loads every (table, frame) pair with COPY."""
+    with open(SCHEMA_PATH) as schema_file:
+        schema = schema_file.read()
+    loaded = {}
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(schema)
+            for table, df in dataset:
+                copy_frame(cursor, table, df)
+                loaded[table] = loaded.get(table, 0) + len(df)
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence('public.posthogevents', 'id'), "
+                "COALESCE((SELECT MAX(id) FROM public.posthogevents), 1))"
+            )
+            cursor.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+    return loaded
+
+
+class ParquetSink:
+    """Writes each table to <directory>/<table>.parquet, appending chunks of the same table."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.writers = {}
+
+    def write(self, table, df):
+        batch = pa.Table.from_pandas(df[COLUMNS[table]], preserve_index=False)
+        if table not in self.writers:
+            self.writers[table] = pq.ParquetWriter(os.path.join(self.directory, f"{table}.parquet"), batch.schema)
+        self.writers[table].write_table(batch)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiple of production volume")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--db-url", help="Postgres URL to create the schema in and COPY rows into")
+    parser.add_argument("--parquet-dir", help="directory to write one Parquet file per table into")
+    args = parser.parse_args()
+    if not args.db_url and not args.parquet_dir:
+        parser.error("give --db-url, --parquet-dir or both")
+
+    dataset = generate_dataset(args.scale, args.seed)
+    sink = ParquetSink(args.parquet_dir) if args.parquet_dir else None
+    if sink:
+        dataset = (sink.write(table, df) or (table, df) for table, df in dataset)
+    try:
+        if args.db_url:
+            loaded = load_postgres(create_engine(args.db_url), dataset)
+        else:
+            loaded = {}
+            for table, df in dataset:
+                loaded[table] = loaded.get(table, 0) + len(df)
+    finally:
+        if sink:
+            sink.close()
+
+    for table, count in loaded.items():
+        print(f"{table}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Concurrent-session load test for the nKPI dashboard.
+
+Spins up N simulated viewers with Streamlit's AppTest in one process, logs each in,
+clicks through the sidebar pages and reports render-time percentiles per page,
+time spent waiting for a pooled DB connection, and memory held per session: the
+figures its page shows, as sent to its browser, and the DataFrames in its
+session_state, at the heaviest page it visited. The process's peak RSS growth is
+reported too, as an aggregate that includes the caches all sessions share. Google
+Sheets is replaced by an in-process fake with a configurable API latency; the
+database is whatever DB_URL (or the local mirror) points at, typically one seeded
+by generate_synthetic_data.py:
+
+    DB_URL=postgresql://localhost/nkpi python load_test.py --sessions 20 --rounds 3
+"""
+import argparse
+import os
+import random
+import re
+import resource
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import gspread
+from google.oauth2.service_account import Credentials
+from gspread.utils import ValueRenderOption
+from sqlalchemy.pool import Pool
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nkpi_dataset_streamlit.py")
+USERNAME = "load-test"
+PASSWORD = "load-test"
+PAGES = [
+    "Capital",
+    "Teams",
+    "Brand",
+    "Network Tooling",
+    "Knowledge",
+    "People/Talent",
+    "Projects",
+    "Programs",
+    "Service Providers",
+    "Other Networks",
+    "User/Customers",
+]
+RUN_TIMEOUT_SECONDS = 120
+
+# Headers of the sheet tables that pages read by column name, keyed by worksheet
+# and top-left cell; every other table gets "Month Year" followed by generic
+# series names.
+FAKE_HEADERS = {
+    (3, "N1"): ["Month Year", "Data"],
+    (3, "I1"): ["Month Year", "Count"],
+    (5, "J1"): ["Month Year", "Time (Min.Sec)"],
+    (7, "I1"): ["Month Year", "Projects", "Stars", "Forks", "Repos"],
+}
+HEADERLESS_TABLES = {(2, "V3"), (4, "T1")}
+FAKE_MONTHS = 24
+FAKE_REVISION = "2025-01-01T00:00:00.000Z"
+SHEETS_EPOCH = pd.Timestamp("1899-12-30")
+
+
+def column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+
+class FakeWorksheet:
+    """
+    Answers get_values() with a FAKE_MONTHS-row monthly table at the top-left cell of
+    the requested A1 range, formatted or not, followed by blank rows.
+    """
+
+    def __init__(self, spreadsheet, index, latency):
+        self.spreadsheet = spreadsheet
+        self.id = index
+        self.index = index
+        self.latency = latency
+
+    def get_values(self, data_range, value_render_option=None, **kwargs):
+        time.sleep(self.latency)
+        first_col, first_row, last_col, last_row = re.fullmatch(r"([A-Z]+)(\d+):([A-Z]+)(\d*)", data_range).groups()
+        anchor = (self.index, f"{first_col}{first_row}")
+        width = column_number(last_col) - column_number(first_col) + 1
+        table_height = FAKE_MONTHS + (anchor not in HEADERLESS_TABLES)
+        # Like the API, an open-ended range stops at the last populated row
+        height = int(last_row) - int(first_row) + 1 if last_row else table_height
+        months = pd.date_range("2024-01-01", periods=FAKE_MONTHS, freq="MS")
+        if value_render_option == ValueRenderOption.unformatted:
+            # Unformatted reads return numbers, and dates as serial day numbers
+            cell = int
+            months = (months - SHEETS_EPOCH).days.tolist()
+        else:
+            cell = str
+            months = months.strftime("%b %Y").tolist()
+        rows = [[month] + [cell(random.randint(1, 500)) for _ in range(width - 1)] for month in months]
+        if anchor not in HEADERLESS_TABLES:
+            header = FAKE_HEADERS.get(
+                anchor,
+                ["Month Year"] + (["Data"] if width == 2 else [f"Series {n}" for n in range(1, width)])
+            )
+            rows = [header] + rows
+        return (rows + [[""] * width] * height)[:height]
+
+
+class FakeSpreadsheet:
+    id = "fake"
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def get_lastUpdateTime(self):
+        return FAKE_REVISION
+
+    def get_worksheet(self, index):
+        return FakeWorksheet(self, index, self.latency)
+
+
+class FakeClient:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def set_timeout(self, timeout):
+        pass
+
+    def open_by_url(self, url):
+        return FakeSpreadsheet(self.latency)
+
+
+class PoolWaitRecorder:
+    """Times every pool checkout, which is where sessions queue when the pool is exhausted."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waits = []
+        self.original_connect = Pool.connect
+
+    def install(self):
+        recorder = self
+
+        def timed_connect(pool):
+            started = time.perf_counter()
+            try:
+                return recorder.original_connect(pool)
+            finally:
+                with recorder.lock:
+                    recorder.waits.append(time.perf_counter() - started)
+
+        Pool.connect = timed_connect
+
+    def uninstall(self):
+        Pool.connect = self.original_connect
+
+
+def install_fakes(latency):
+    """Routes Sheets access to FakeClient and provides the env the app expects."""
+    gspread.authorize = lambda credentials: FakeClient(latency)
+    Credentials.from_service_account_info = classmethod(lambda cls, info, scopes=None: object())
+    os.environ.setdefault("GOOGLE_SHEET_PRIVATE_KEY", "fake")
+    os.environ.setdefault("GOOGLE_SHEET_SPREADSHEET_URL", "https://docs.google.com/spreadsheets/d/fake")
+    os.environ["NKPI_USERNAME"] = USERNAME
+    os.environ["NKPI_PASSWORD"] = PASSWORD
+
+
+def held_bytes(app):
+    """Memory one simulated viewer holds: its page's Plotly figures as sent to the browser, and its session_state frames."""
+    figures = sum(len(chart.proto.spec) for chart in app.get("plotly_chart"))
+    frames = sum(
+        int(value.memory_usage(deep=True).sum()) for value in app.session_state.values()
+        if isinstance(value, pd.DataFrame)
+    )
+    return figures + frames
+
+
+def run_session(session, rounds):
+    """
+    Logs one simulated viewer in and visits every page `rounds` times; returns
+    (page, seconds, ok) samples and the most memory the viewer held on any page.
+    """
+    app = AppTest.from_file(APP_PATH, default_timeout=RUN_TIMEOUT_SECONDS)
+    samples = []
+    peak_bytes = 0
+    started = time.perf_counter()
+    app.run()
+    app.sidebar.text_input(key="username_input").input(USERNAME)
+    app.sidebar.text_input(key="password_input").input(PASSWORD)
+    app.sidebar.button[0].click().run()
+    samples.append(("(login)", time.perf_counter() - started, not app.exception))
+
+    pages = PAGES[session % len(PAGES):] + PAGES[:session % len(PAGES)]
+    for _ in range(rounds):
+        for page in pages:
+            started = time.perf_counter()
+            app.sidebar.radio[0].set_value(page).run()
+            samples.append((page, time.perf_counter() - started, not app.exception and not app.error))
+            peak_bytes = max(peak_bytes, held_bytes(app))
+    return samples, peak_bytes
+
+
+def report(samples, waits, session_bytes, rss_growth_kb, elapsed):
+    by_page = defaultdict(list)
+    failures = defaultdict(int)
+    for page, seconds, ok in samples:
+        by_page[page].append(seconds)
+        failures[page] += not ok
+
+    print(f"{'page':20} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for page, durations in sorted(by_page.items()):
+        p50, p95, p99 = np.percentile(np.array(durations) * 1000, [50, 95, 99])
+        print(f"{page:20} {len(durations):5} {p50:9.0f} {p95:9.0f} {p99:9.0f} {failures[page]:7}")
+
+    all_durations = np.array([seconds for _, seconds, _ in samples]) * 1000
+    p50, p95, p99 = np.percentile(all_durations, [50, 95, 99])
+    print(f"{'all pages':20} {len(all_durations):5} {p50:9.0f} {p95:9.0f} {p99:9.0f} {sum(failures.values()):7}")
+
+    if waits:
+        wait_p50, wait_p95, wait_max = np.percentile(np.array(waits) * 1000, [50, 95, 100])
+        print(f"DB pool checkouts: {len(waits)}, wait p50 {wait_p50:.1f} ms, p95 {wait_p95:.1f} ms, max {wait_max:.1f} ms")
+    else:
+        print("DB pool checkouts: 0")
+    held_p50, held_max = np.percentile(np.array(session_bytes) / 1024, [50, 100])
+    print(f"Memory held per session (figures and session_state frames): p50 {held_p50:.0f} KiB, max {held_max:.0f} KiB")
+    print(f"Process peak RSS growth, all sessions and shared caches: {rss_growth_kb / 1024:.1f} MiB")
+    print(f"Wall time: {elapsed:.1f} s for {len(session_bytes)} concurrent sessions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent simulated viewers")
+    parser.add_argument("--rounds", type=int, default=2, help="times each viewer clicks through every page")
+    parser.add_argument("--sheets-latency", type=float, default=0.15,
+                        help="simulated seconds per Sheets get_values call")
+    args = parser.parse_args()
+
+    install_fakes(args.sheets_latency)
+    recorder = PoolWaitRecorder()
+    recorder.install()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+            results = list(executor.map(lambda session: run_session(session, args.rounds), range(args.sessions)))
+    finally:
+        recorder.uninstall()
+    elapsed = time.perf_counter() - started
+    rss_growth_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    report(
+        [sample for samples, _ in results for sample in samples],
+        recorder.waits,
+        [peak_bytes for _, peak_bytes in results],
+        rss_growth_kb,
+        elapsed,
+    )
+
+
+if __name__ == "__main__":
+    main()
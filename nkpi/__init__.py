@@ -0,0 +1,4 @@
+"""
+Modules behind the nKPI dashboard. nkpi_dataset_streamlit.py is the entry point;
+each sidebar page lives in nkpi.pages and is imported the first time it is shown.
+"""
@@ -0,0 +1,180 @@
+"""
+Asynchronous database access, for pages and jobs that need several query results
+at once.
+
+execute_query_async is execute_query as a coroutine. It reads through the same
+process-wide cache, snapshots and shared backend, and routes to the mirror,
+replicas and primary the same way. Its queries run over asyncpg on one event loop
+per process, which lives on its own daemon thread. At most DB_ASYNC_CONCURRENCY
+(default 4) of them run at a time, whichever sessions issued them, so awaiting
+many fetches at once neither starts a thread per query nor floods Postgres.
+
+From synchronous code, run_concurrently(*coroutines) runs the coroutines together
+on that loop and returns their results in order:
+
+    members, teams = run_concurrently(
+        fetch_event_participation_member_data_async(start_month, end_month),
+        fetch_event_participation_team_data_async(start_month, end_month),
+    )
+
+submit() returns a concurrent.futures.Future for the same results instead, so
+callers can wait with their own deadline (see nkpi.render.wait_for). Cancelling
+it cancels the queries still running, and asyncpg asks Postgres to stop them.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from sqlalchemy.exc import DBAPIError
+
+from nkpi.cache import cache_only, cached_result_async
+from nkpi.queries import (
+    REPLICA_CONNECT_TIMEOUT_SECONDS,
+    choose_replica,
+    event_participation_query,
+    get_database_connection,
+    mark_down,
+    monthly_active_user_query,
+    note_source,
+    read_sources,
+    read_sql,
+    run_query,
+    session_durations_query,
+)
+from nkpi_mirror import mirror_available
+
+ASYNC_CONCURRENCY = int(os.getenv("DB_ASYNC_CONCURRENCY", 4))
+ASYNC_DRIVER = "postgresql+asyncpg"
+
+
+def async_url(url):
+    """A SQLAlchemy URL with its driver swapped for asyncpg."""
+    return url.set(drivername=ASYNC_DRIVER)
+
+
+@st.cache_resource
+def get_async_runtime():
+    """The process's event loop, running on its own thread, and what its queries share."""
+    loop = asyncio.new_event_loop()
+    # Mirror queries, replica checks and cache lookups block, so they run on these threads.
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=ASYNC_CONCURRENCY, thread_name_prefix="nkpi-async"))
+    threading.Thread(target=loop.run_forever, name="nkpi-async-loop", daemon=True).start()
+    return {"loop": loop, "semaphore": asyncio.Semaphore(ASYNC_CONCURRENCY), "engines": {}}
+
+
+def get_async_engine(name, url, **connect_args):
+    """
+    The asyncpg engine for one server, created on first use. Only called on the
+    loop, whose engines must not be used from any other.
+    """
+    # Imported here so the synchronous path doesn't need asyncpg installed.
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engines = get_async_runtime()["engines"]
+    if name not in engines:
+        engines[name] = create_async_engine(async_url(url), connect_args=connect_args)
+    return engines[name]
+
+
+async def read_sql_async(engine, query, params, source):
+    async with get_async_runtime()["semaphore"]:
+        async with engine.connect() as connection:
+            # The synchronous path's read_sql, run over asyncpg, so results get the same
+            # dtypes (numerics coerced to float, then compacted) and attrs whichever path
+            # fills the cache entry both share.
+            return await connection.run_sync(read_sql, query, params, source)
+
+
+async def query_replica_async(replica, query, params):
+    """Runs a query on a replica; returns None, marking it down, when the replica can't be reached."""
+    engine = get_async_engine(
+        replica["name"], replica["engine"].url, timeout=REPLICA_CONNECT_TIMEOUT_SECONDS
+    )
+    try:
+        return await read_sql_async(
+            engine, query, params, {"server": replica["name"], "lag_seconds": replica["lag_seconds"]}
+        )
+    except (OSError, asyncio.TimeoutError) as e:
+        # asyncpg raises these when the server can't be reached or drops the connection.
+        mark_down(replica, e)
+        return None
+    except DBAPIError as e:
+        # Errors in the query itself are the query's, not the replica's.
+        if not e.connection_invalidated:
+            raise
+        mark_down(replica, e)
+        return None
+
+
+async def run_query_async(query, params=None, mirror_query=None):
+    """run_query as a coroutine: the mirror when configured, else a replica, else the primary."""
+    if mirror_query and mirror_available():
+        return await asyncio.to_thread(run_query, query, params, mirror_query)
+
+    replica = await asyncio.to_thread(choose_replica)
+    if replica is not None:
+        df = await query_replica_async(replica, query, params)
+        if df is not None:
+            return df
+    engine = get_async_engine("primary", get_database_connection().url)
+    return await read_sql_async(engine, query, params, {"server": "primary", "lag_seconds": 0.0})
+
+
+async def execute_query_async(query, params=None, mirror_query=None):
+    """execute_query as a coroutine, sharing its cache entries."""
+    key = (query, tuple(sorted((params or {}).items())), mirror_query)
+    df = await cached_result_async(key, lambda: run_query_async(query, params, mirror_query))
+    note_source(df.attrs.get("source"))
+    return df
+
+
+def submit(*coroutines):
+    """
+    Runs the coroutines together on the process's loop; the Future returned
+    resolves to their results, in order.
+
+    They see the caller's cached_only() and recording_sources(), as if they ran on
+    its thread.
+    """
+    only_cached, sources = cache_only.get(), read_sources.get()
+
+    async def gather():
+        cache_only.set(only_cached)
+        read_sources.set(sources)
+        return await asyncio.gather(*coroutines)
+
+    return asyncio.run_coroutine_threadsafe(gather(), get_async_runtime()["loop"])
+
+
+def run_concurrently(*coroutines):
+    """The results of the coroutines, run together on the process's loop."""
+    future = submit(*coroutines)
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+async def fetch_session_durations_async(start_month=None, end_month=None, granularity="month"):
+    return await execute_query_async(*session_durations_query(start_month, end_month, granularity))
+
+
+async def fetch_monthly_active_user_async(start_month=None, end_month=None, granularity="month"):
+    return await execute_query_async(*monthly_active_user_query(start_month, end_month, granularity))
+
+
+async def fetch_event_participation_data_async(guest_column, start_month=None, end_month=None, granularity="month", level="period"):
+    return await execute_query_async(
+        *event_participation_query(guest_column, start_month, end_month, granularity, level)
+    )
+
+
+async def fetch_event_participation_member_data_async(start_month=None, end_month=None, granularity="month", level="period"):
+    return await fetch_event_participation_data_async("memberUid", start_month, end_month, granularity, level)
+
+
+async def fetch_event_participation_team_data_async(start_month=None, end_month=None, granularity="month", level="period"):
+    return await fetch_event_participation_data_async("teamUid", start_month, end_month, granularity, level)
@@ -0,0 +1,385 @@
+"""
+Process-wide cache of query results, shared read-only by every session.
+
+Results are kept as immutable Arrow tables together with one DataFrame over the
+table's buffers. Callers get a shallow copy of that frame, so a cache hit neither
+unpickles nor copies any data: under pandas copy-on-write (always on from pandas 3,
+which requirements.txt pins) the columns stay shared until a caller writes to one
+(fillna(inplace=True), df.loc[...] = ...), which then copies only that column for
+that caller.
+
+When NKPI_SNAPSHOT_DIR is set, results are also written there as Arrow IPC files
+that every worker process memory-maps read-only, so several Streamlit processes
+on one host share one physical copy of each result and a newly started worker
+reads them instead of querying. A snapshot older than RESULT_MAX_AGE_SECONDS is
+recomputed by the first worker to need it and swapped in with an atomic rename;
+workers still using the old file keep their mapping of it.
+
+When NKPI_CACHE_URL is set, results are also shared between replicas through a
+cache backend, as zstd-compressed Arrow IPC payloads that expire after
+RESULT_MAX_AGE_SECONDS, so one replica's query warms every other replica.
+"redis://host:port/db" uses a Redis server (or anything speaking its protocol)
+and "memory://" an in-process store with the same behaviour, for a single replica
+or for trying the shared path locally. A backend that fails is skipped for
+BACKEND_RETRY_SECONDS, so an unreachable Redis costs one connect timeout per
+retry period rather than two per cache miss, and each session is warned once per
+outage. Keys include CACHE_VERSION, to be bumped
+whenever the shape of cached results changes so replicas running different
+versions don't read each other's entries.
+
+cached_result_async is the same cache for coroutines on one event loop (see
+nkpi.async_queries): hits are served on the loop, and on a miss the snapshot and
+shared lookups run on a worker thread while the result is awaited.
+
+Code run under cached_only() is served whatever this process already holds, however
+old, and gets NotCached instead of a fetch for anything else. The sheet rows and
+rollups in nkpi.sheets and nkpi.queries follow it too.
+"""
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+
+import pyarrow as pa
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+SNAPSHOT_DIR = os.getenv("NKPI_SNAPSHOT_DIR")
+CACHE_URL = os.getenv("NKPI_CACHE_URL")
+CACHE_VERSION = 1
+RESULT_MAX_AGE_SECONDS = 15 * 60
+BACKEND_RETRY_SECONDS = 30
+CREATED_AT_FIELD = b"nkpi.created_at"
+
+cache_only = contextvars.ContextVar("cache_only", default=False)
+
+
+class NotCached(Exception):
+    """Raised under cached_only() for data that isn't cached yet."""
+
+
+@contextlib.contextmanager
+def cached_only():
+    """Serves the enclosed block from the caches only, see the module docstring."""
+    token = cache_only.set(True)
+    try:
+        yield
+    finally:
+        cache_only.reset(token)
+
+
+class MemoryBackend:
+    """Keeps payloads in this process, expiring them like Redis would."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.payloads = {}
+
+    def get(self, name):
+        with self.lock:
+            payload, expires_at = self.payloads.get(name, (None, 0))
+            if time.time() >= expires_at:
+                self.payloads.pop(name, None)
+                return None
+            return payload
+
+    def set(self, name, payload, ttl):
+        with self.lock:
+            self.payloads[name] = (payload, time.time() + ttl)
+
+
+class RedisBackend:
+    """Keeps payloads in a Redis server, shared by every replica using the same URL."""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+
+    def get(self, name):
+        return self.client.get(name)
+
+    def set(self, name, payload, ttl):
+        self.client.set(name, payload, ex=ttl)
+
+
+CACHE_BACKENDS = {
+    "memory": lambda url: MemoryBackend(),
+    "redis": RedisBackend,
+    "rediss": RedisBackend,
+}
+
+
+@st.cache_resource
+def get_cache_backend():
+    """The backend NKPI_CACHE_URL points at, or None when results aren't shared."""
+    if not CACHE_URL:
+        return None
+    scheme = urlparse(CACHE_URL).scheme
+    if scheme not in CACHE_BACKENDS:
+        raise ValueError(f"Unsupported NKPI_CACHE_URL scheme: {scheme}")
+    return CACHE_BACKENDS[scheme](CACHE_URL)
+
+
+@st.cache_resource
+def get_backend_health():
+    # The backend is skipped until "down_until" after a failure. "warned" holds the
+    # sessions already told about the current outage.
+    return {"lock": threading.Lock(), "down_until": 0, "warned": set()}
+
+
+def available_backend():
+    """The shared backend, or None when results aren't shared or it failed less than BACKEND_RETRY_SECONDS ago."""
+    backend = get_cache_backend()
+    if backend is None or time.time() < get_backend_health()["down_until"]:
+        return None
+    return backend
+
+
+def backend_failed(message):
+    """Takes the backend out of use for BACKEND_RETRY_SECONDS and warns the session, once per outage."""
+    health = get_backend_health()
+    ctx = get_script_run_ctx(suppress_warning=True)
+    with health["lock"]:
+        health["down_until"] = time.time() + BACKEND_RETRY_SECONDS
+        warn = ctx is not None and ctx.session_id not in health["warned"]
+        if warn:
+            health["warned"].add(ctx.session_id)
+    if warn:
+        st.warning(message)
+
+
+def backend_succeeded():
+    health = get_backend_health()
+    if health["warned"]:
+        with health["lock"]:
+            health["warned"].clear()
+
+
+def shared_get(name):
+    """Payload `name` from the shared backend, or None when it is missing or unreachable."""
+    backend = available_backend()
+    if backend is None:
+        return None
+    try:
+        payload = backend.get(name)
+    except Exception as e:
+        backend_failed(f"Shared cache unavailable, querying directly for the next {BACKEND_RETRY_SECONDS} s: {e}")
+        return None
+    backend_succeeded()
+    return payload
+
+
+def shared_set(name, payload):
+    backend = available_backend()
+    if backend is None:
+        return
+    try:
+        backend.set(name, payload, RESULT_MAX_AGE_SECONDS)
+    except Exception as e:
+        backend_failed(f"Could not share results with other replicas for the next {BACKEND_RETRY_SECONDS} s: {e}")
+        return
+    backend_succeeded()
+
+
+def shared_name(kind, key):
+    digest = hashlib.sha256(repr(key).encode()).hexdigest()
+    return f"nkpi:v{CACHE_VERSION}:{kind}:{digest}"
+
+
+def encode_table(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression="zstd")) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_table(payload):
+    return pa.ipc.open_stream(payload).read_all()
+
+
+def encode_rows(rows):
+    """Sheet rows (JSON values straight from the Sheets API) as a compressed payload."""
+    return zlib.compress(json.dumps(rows).encode())
+
+
+def decode_rows(payload):
+    return json.loads(zlib.decompress(payload))
+
+
+@st.cache_resource
+def get_result_cache():
+    # "locks" holds one lock per key being computed, so concurrent sessions asking
+    # for the same result wait for a single query instead of each running it.
+    # "tasks" does the same for cached_result_async and is only used on its loop.
+    return {"lock": threading.Lock(), "entries": {}, "locks": {}, "tasks": {}}
+
+
+def to_arrow(df):
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def to_frame(table):
+    """A DataFrame over table's buffers, zero-copy for numeric, date and categorical columns."""
+    return table.to_pandas(split_blocks=True)
+
+
+def snapshot_path(key):
+    digest = hashlib.sha256(repr(key).encode()).hexdigest()
+    return os.path.join(SNAPSHOT_DIR, f"{digest}.arrow")
+
+
+def read_snapshot(path):
+    """Returns a fresh snapshot at path, or None."""
+    try:
+        if time.time() - os.stat(path).st_mtime >= RESULT_MAX_AGE_SECONDS:
+            return None
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    return table if is_fresh(table) else None
+
+
+def write_snapshot(path, table):
+    """Writes table to path through a temporary file, so readers never see a partial snapshot."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+    try:
+        with pa.OSFile(partial, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    prune_snapshots()
+
+
+def prune_snapshots():
+    """Removes snapshots no worker would read any more, e.g. for date ranges nobody views."""
+    for entry in os.scandir(SNAPSHOT_DIR):
+        try:
+            if entry.name.endswith(".arrow") and time.time() - entry.stat().st_mtime >= 2 * RESULT_MAX_AGE_SECONDS:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def created_at(table):
+    """When the result in table was computed, by whichever worker or replica computed it."""
+    return float((table.schema.metadata or {}).get(CREATED_AT_FIELD, 0))
+
+
+def is_fresh(table):
+    # Results only shared within this process are kept for its whole life.
+    if not SNAPSHOT_DIR and not CACHE_URL:
+        return True
+    return time.time() - created_at(table) < RESULT_MAX_AGE_SECONDS
+
+
+def fetch_table(key, compute):
+    """The result for key from the shared backend when it has a fresh one, else from `compute()`."""
+    name = shared_name("query", key)
+    payload = shared_get(name)
+    if payload is not None:
+        table = decode_table(payload)
+        if is_fresh(table):
+            return table
+    table = to_arrow(compute())
+    metadata = {**(table.schema.metadata or {}), CREATED_AT_FIELD: str(time.time()).encode()}
+    table = table.replace_schema_metadata(metadata)
+    shared_set(name, encode_table(table))
+    return table
+
+
+def load_table(key, compute):
+    """The result for key from a fresh snapshot when there is one, else from fetch_table."""
+    if not SNAPSHOT_DIR:
+        return fetch_table(key, compute)
+    path = snapshot_path(key)
+    table = read_snapshot(path)
+    if table is None:
+        table = fetch_table(key, compute)
+        write_snapshot(path, table)
+        # Map the file just written, unless another worker's refresh already replaced it.
+        table = read_snapshot(path) or table
+    return table
+
+
+def cached_result(key, compute):
+    """
+    Returns the DataFrame cached under `key`, calling `compute()` to produce it on a miss.
+
+    `key` must be hashable, and its repr stable across processes when snapshots are
+    on. Errors from `compute` are raised and nothing is cached.
+    """
+    cache = get_result_cache()
+    with cache["lock"]:
+        entry = cache["entries"].get(key)
+        if cache_only.get():
+            if entry is None:
+                raise NotCached(key)
+        elif entry is None or not is_fresh(entry["table"]):
+            entry = None
+            key_lock = cache["locks"].setdefault(key, threading.Lock())
+    if entry is None:
+        with key_lock:
+            with cache["lock"]:
+                entry = cache["entries"].get(key)
+            if entry is None or not is_fresh(entry["table"]):
+                table = load_table(key, compute)
+                entry = {"table": table, "frame": to_frame(table)}
+                with cache["lock"]:
+                    cache["entries"][key] = entry
+                    cache["locks"].pop(key, None)
+    return entry["frame"].copy(deep=False)
+
+
+async def cached_result_async(key, compute):
+    """
+    cached_result for coroutines: awaits `compute()` on a miss. Concurrent misses
+    for one key await a single computation instead of each running it.
+    """
+    cache = get_result_cache()
+    with cache["lock"]:
+        entry = cache["entries"].get(key)
+    if entry is not None and (cache_only.get() or is_fresh(entry["table"])):
+        return entry["frame"].copy(deep=False)
+    if cache_only.get():
+        raise NotCached(key)
+
+    pending = cache["tasks"].get(key)
+    if pending is None:
+        pending = cache["tasks"][key] = {"task": asyncio.ensure_future(load_result_async(key, compute)), "waiters": 0}
+        pending["task"].add_done_callback(lambda task: cache["tasks"].pop(key, None))
+    pending["waiters"] += 1
+    try:
+        # Shielded, so a caller being cancelled doesn't cancel the others' computation;
+        # it is cancelled once nobody waits for it any more.
+        df = await asyncio.shield(pending["task"])
+    except asyncio.CancelledError:
+        if pending["waiters"] == 1:
+            pending["task"].cancel()
+        raise
+    finally:
+        pending["waiters"] -= 1
+    return df.copy(deep=False)
+
+
+async def load_result_async(key, compute):
+    """The result for key from a snapshot or the shared backend, else from `compute()`, cached."""
+    def stored_only():
+        raise NotCached(key)
+
+    try:
+        return await asyncio.to_thread(cached_result, key, stored_only)
+    except NotCached:
+        pass
+    df = await compute()
+    return await asyncio.to_thread(cached_result, key, lambda: df)
@@ -0,0 +1,57 @@
+"""
+Compact dtypes for the frames the dashboard caches and plots.
+"""
+import numpy as np
+import pandas as pd
+
+# A string column becomes a categorical when at most this share of its values is distinct.
+CATEGORY_MAX_DISTINCT_RATIO = 0.5
+
+# Integer columns are narrowed no further than int32: sums and differences of int8 or
+# int16 columns wrap around silently, while int32 holds any count the dashboard shows.
+INTEGER_DTYPES = ("int32", "int64")
+
+
+def compact_integers(column):
+    """Returns column as the first of INTEGER_DTYPES that holds all its values, or unchanged if none does."""
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if column.empty or (info.min <= column.min() and column.max() <= info.max):
+            return column.astype(dtype)
+    return column
+
+
+def compact_frame(df):
+    """
+    Returns df with compact dtypes, without changing any value.
+
+    Integer columns, and float columns holding only whole numbers, become int32 when
+    their values fit and int64 otherwise; columns with fractions or missing numbers
+    keep their dtype. String columns with repeated values become categoricals.
+    """
+    compacted = {}
+    for name, column in df.items():
+        if isinstance(column.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(column):
+            continue
+        if pd.api.types.is_integer_dtype(column):
+            if column.notna().all():
+                compacted[name] = compact_integers(column)
+        elif pd.api.types.is_float_dtype(column):
+            if column.notna().all() and (column % 1 == 0).all():
+                compacted[name] = compact_integers(column)
+        elif (
+            pd.api.types.infer_dtype(column, skipna=True) == "string"
+            and column.nunique() <= len(column) * CATEGORY_MAX_DISTINCT_RATIO
+        ):
+            compacted[name] = column.astype("category")
+    if not compacted:
+        return df
+    df = df.copy(deep=False)
+    for name, column in compacted.items():
+        df[name] = column
+    return df
+
+
+def frame_bytes(df):
+    """Memory held by df, including the strings of object columns."""
+    return int(df.memory_usage(deep=True).sum())
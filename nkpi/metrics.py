@@ -0,0 +1,121 @@
+"""
+Derived metrics of monthly KPI series: month-over-month and year-over-year growth,
+rolling means and cumulative totals.
+
+A chart's series come as a frame indexed by month_key with one column per series.
+They are aligned on a contiguous month axis (months missing from the source are
+NaN), so lag 1 is always the previous month and lag 12 the same month a year
+earlier, and every metric is computed for all series at once on that
+month-by-series matrix.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from nkpi.months import format_month_key
+
+ROLLING_MONTHS = 3
+METRICS = {
+    "value": "Value",
+    "mom": "MoM %",
+    "yoy": "YoY %",
+    "rolling": f"{ROLLING_MONTHS}-month avg",
+    "cumulative": "Cumulative",
+}
+
+
+def month_axis(month_keys):
+    """Every month_key from the first to the last of month_keys, in order."""
+    first, last = int(month_keys.min()), int(month_keys.max())
+    months = np.arange((first // 100) * 12 + first % 100 - 1, (last // 100) * 12 + last % 100)
+    return (months // 12) * 100 + months % 12 + 1
+
+
+def lagged(matrix, months):
+    """matrix shifted down by `months` rows, NaN where there is no earlier month."""
+    shifted = np.full_like(matrix, np.nan)
+    if months < len(matrix):
+        shifted[months:] = matrix[:-months]
+    return shifted
+
+
+def growth(matrix, months):
+    """Relative change against `months` earlier; NaN where either value is missing or the earlier one is 0."""
+    earlier = lagged(matrix, months)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(earlier != 0, matrix / earlier - 1, np.nan)
+
+
+def rolling_mean(matrix, window):
+    """Mean of the last `window` months, NaN unless all of them have a value."""
+    present = ~np.isnan(matrix)
+    sums = np.vstack([np.zeros((1, matrix.shape[1])), np.cumsum(np.where(present, matrix, 0), axis=0)])
+    counts = np.vstack([np.zeros((1, matrix.shape[1])), np.cumsum(present, axis=0)])
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    means = np.full_like(matrix, np.nan)
+    means[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return means
+
+
+def cumulative(matrix):
+    """Running total, skipping missing months; NaN before a series' first value."""
+    totals = np.nancumsum(matrix, axis=0)
+    return np.where(np.cumsum(~np.isnan(matrix), axis=0) > 0, totals, np.nan)
+
+
+@functools.lru_cache(maxsize=512)
+def derive(month_keys, names, values):
+    """
+    Derived metrics for the series in `values` (bytes of a float64 month-by-series
+    matrix), memoized on the source data itself so a series is derived once per
+    version of its data, whichever session or chart asks.
+    """
+    months = month_axis(np.frombuffer(month_keys, dtype=np.int64))
+    source = np.frombuffer(values, dtype=np.float64).reshape(-1, len(names))
+    matrix = np.full((len(months), len(names)), np.nan)
+    matrix[np.searchsorted(months, np.frombuffer(month_keys, dtype=np.int64))] = source
+    metrics = {
+        "value": matrix,
+        "mom": growth(matrix, 1),
+        "yoy": growth(matrix, 12),
+        "rolling": rolling_mean(matrix, ROLLING_MONTHS),
+        "cumulative": cumulative(matrix),
+    }
+    columns = pd.MultiIndex.from_product([list(metrics), names], names=["metric", "series"])
+    return pd.DataFrame(np.hstack(list(metrics.values())), index=pd.Index(months, name="month_key"), columns=columns)
+
+
+def derived_metrics(series):
+    """
+    Every metric of every series in `series` (a frame indexed by month_key, one
+    numeric column per series) per month, as a frame with (metric, series) columns.
+    """
+    series = series.groupby(level="month_key").sum(min_count=1).sort_index()
+    if series.empty:
+        return pd.DataFrame(columns=pd.MultiIndex.from_product([list(METRICS), []], names=["metric", "series"]))
+    return derive(
+        series.index.to_numpy(dtype=np.int64).tobytes(),
+        tuple(str(name) for name in series.columns),
+        series.to_numpy(dtype=np.float64, na_value=np.nan).tobytes(),
+    ).copy()
+
+
+def latest_metrics(series):
+    """
+    One row per series: its latest month with a value and every metric at that month,
+    with the metric labels of METRICS as columns.
+    """
+    metrics = derived_metrics(series)
+    rows = []
+    for name in metrics.columns.get_level_values("series").unique():
+        by_month = metrics.xs(name, axis=1, level="series")
+        values = by_month["value"].dropna()
+        if values.empty:
+            continue
+        latest = by_month.loc[values.index[-1]]
+        rows.append({"Series": name, "Month": format_month_key([values.index[-1]]).iloc[0], **{
+            label: latest[metric] for metric, label in METRICS.items()
+        }})
+    return pd.DataFrame(rows, columns=["Series", "Month", *METRICS.values()])
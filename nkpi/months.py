@@ -0,0 +1,107 @@
+"""
+Month keys: the canonical YYYYMM integers every sheet table and query result is keyed by.
+"""
+from datetime import date
+
+import pandas as pd
+
+GRANULARITIES = {"month": "M", "quarter": "Q", "year": "Y"}
+
+# Month labels seen in the sheets and queries, tried in order before falling back
+# to pandas' per-value format inference.
+MONTH_INPUT_FORMATS = ("%b %Y", "%B %Y", "%Y-%m", "%Y-%m-%d", "%m/%d/%Y", "%b-%y", "%b %y")
+MONTH_LABEL_FORMAT = "%b %Y"
+
+
+def to_month_start(value):
+    """Normalizes a date-like value or YYYYMM month key to midnight on the first day of its month."""
+    if pd.api.types.is_integer(value):
+        return pd.Timestamp(year=value // 100, month=value % 100, day=1)
+    return pd.Timestamp(value).to_period("M").to_timestamp()
+
+
+def to_month_key(values):
+    """
+    Canonical YYYYMM integer month key (2024-07 -> 202407) used for sorting, joining and caching.
+
+    Accepts a scalar or a Series of datetimes, month keys or month labels, possibly mixed
+    with dates. Labels are parsed once with the MONTH_INPUT_FORMATS, and values that are
+    not months become <NA>.
+    """
+    if pd.api.types.is_scalar(values):
+        month = to_month_start(values)
+        return month.year * 100 + month.month
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype("Int64")
+    if pd.api.types.is_datetime64_any_dtype(values):
+        months = values
+    else:
+        months = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+        is_date = values.map(lambda value: isinstance(value, date))
+        if is_date.any():
+            months[is_date] = pd.to_datetime(values[is_date])
+        labels = values.where(~is_date).astype("string").str.strip()
+        for month_format in MONTH_INPUT_FORMATS:
+            missing = months.isna() & labels.notna()
+            if not missing.any():
+                break
+            months[missing] = pd.to_datetime(labels[missing], format=month_format, errors="coerce")
+        missing = months.isna() & labels.notna() & (labels != "")
+        if missing.any():
+            months[missing] = pd.to_datetime(labels[missing], format="mixed", errors="coerce")
+    return (months.dt.year * 100 + months.dt.month).astype("Int64")
+
+
+def format_month_key(keys, month_format=MONTH_LABEL_FORMAT):
+    """Renders YYYYMM month keys as labels; only done when a chart or table is drawn."""
+    keys = pd.Series(keys, dtype="Int64")
+    return pd.to_datetime(keys.astype("string"), format="%Y%m", errors="coerce").dt.strftime(month_format)
+
+
+def period_key(keys, granularity="month"):
+    """Month key of the first month of the period each key falls in, using integer arithmetic only."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    if granularity == "month":
+        return keys
+    months = keys % 100
+    first_month = (months - 1) // 3 * 3 + 1 if granularity == "quarter" else 1
+    return keys - months + first_month
+
+
+def format_period_key(keys, granularity="month"):
+    """Labels the period keys returned by period_key: "Jul 2024", "2024 Q3" or "2024"."""
+    if granularity == "month":
+        return format_month_key(keys)
+    keys = pd.Series(keys, dtype="Int64")
+    years = (keys // 100).astype("string")
+    if granularity == "year":
+        return years
+    return years + " Q" + ((keys % 100 - 1) // 3 + 1).astype("string")
+
+
+def index_by_month(df, column="Month-Year"):
+    """
+    Keys a sheet table by month: `column` is parsed once into a sorted int32 month_key
+    index, rows that are not months are dropped and `column` is rewritten as the display
+    label, a categorical ordered by month.
+    """
+    keys = to_month_key(df[column].reset_index(drop=True))
+    df = df.reset_index(drop=True)[keys.notna()]
+    df.index = pd.Index(keys[keys.notna()].astype("int32"), name="month_key")
+    df = df.sort_index(kind="stable")
+    labels = format_month_key(df.index)
+    df[column] = pd.Categorical(labels, categories=labels.drop_duplicates(), ordered=True)
+    return df
+
+
+def in_month_range(keys, start_month=None, end_month=None):
+    """Boolean mask of the month keys in `keys` that fall inside [start_month, end_month]."""
+    mask = pd.Series(True, index=keys.index)
+    if start_month is not None:
+        mask &= keys >= to_month_key(start_month)
+    if end_month is not None:
+        mask &= keys <= to_month_key(end_month)
+    return mask.fillna(False).astype(bool)
+
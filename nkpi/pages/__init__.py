@@ -0,0 +1,21 @@
+"""
+One module per dashboard page, each exposing render(start_month, end_month), and the
+CHARTS it lays out when the page is a chart grid.
+"""
+
+# Sidebar page -> module rendering it. A page's module, and with it pandas, plotly,
+# SQLAlchemy and the Sheets client, is only imported when the page is first shown,
+# so the login screen starts without them.
+PAGES = {
+    "Capital": "nkpi.pages.capital",
+    "Teams": "nkpi.pages.teams",
+    "Brand": "nkpi.pages.brand",
+    "Network Tooling": "nkpi.pages.network_tooling",
+    "Knowledge": "nkpi.pages.knowledge",
+    "People/Talent": "nkpi.pages.people_talent",
+    "Projects": "nkpi.pages.projects",
+    "Programs": "nkpi.pages.programs",
+    "Service Providers": "nkpi.pages.service_providers",
+    "Other Networks": "nkpi.pages.other_networks",
+    "User/Customers": "nkpi.pages.user_customers",
+}
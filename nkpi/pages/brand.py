@@ -0,0 +1,168 @@
+"""
+Brand page: share of voice, audience growth, engagement and email subscribers.
+"""
+import pandas as pd
+import plotly.express as px
+
+from nkpi.months import index_by_month
+from nkpi.render import render_charts
+from nkpi.sheets import get_sheet_values, sheet_series
+
+
+def plot_engagement_rate(worksheet, start_month=None, end_month=None):
+    """Monthly engagement rate."""
+    data = get_sheet_values(worksheet, 'N1:O', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+
+    if "Month Year" in df.columns:
+        df.rename(columns={"Month Year": "Month-Year"}, inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df[df["Data"] > 0]
+
+    df = index_by_month(df)
+
+    df_long = df.melt(
+        id_vars="Month-Year",
+        value_vars=[col for col in df.columns if col != "Month-Year"],
+        var_name="Type",
+        value_name="Value"
+    )
+
+    df_long = df_long[df_long["Value"] > 0]
+
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "Engagement Rate"},
+        height=500,
+        barmode="stack"
+    )
+
+    fig.update_traces(
+        texttemplate='%{y:.2%}',
+        textposition='outside'
+    )
+
+    fig.update_layout(
+        xaxis_tickformat="%b %Y",
+        xaxis_tickangle=360,
+        yaxis_tickformat='.0%',
+    )
+
+    return fig
+
+
+def plot_audience_growth(worksheet, start_month=None, end_month=None):
+    """Monthly audience size."""
+    data = get_sheet_values(worksheet, 'I1:J', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+
+    if "Month Year" in df.columns:
+        df.rename(columns={"Month Year": "Month-Year"}, inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = index_by_month(df)
+
+    df_long = df.melt(
+        id_vars="Month-Year",
+        value_vars=[col for col in df.columns if col != "Month-Year"],
+        var_name="Type",
+        value_name="Value"
+    )
+
+    df_long = df_long[df_long["Value"] > 0]
+
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "No. Of Audience"},
+        height=500,
+        barmode="stack"
+    )
+
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    fig.update_layout(
+        xaxis_tickformat="%b %Y",
+        xaxis_tickangle=360,
+    )
+
+    return fig
+
+
+def plot_email_subscribers(worksheet, start_month=None, end_month=None):
+    """Monthly email subscribers."""
+    data = get_sheet_values(worksheet, 'S1:T', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+
+    if "Month Year" in df.columns:
+        df.rename(columns={"Month Year": "Month-Year"}, inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df.dropna(subset=["Month-Year", "Data"], inplace=True)
+    df = index_by_month(df)
+
+    df_long = df.melt(
+        id_vars="Month-Year",
+        value_vars=[col for col in df.columns if col != "Month-Year"],
+        var_name="Type",
+        value_name="Value"
+    )
+
+    df_long = df_long[df_long["Value"] > 0]
+
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "No. Of Subscribers"},
+        height=500,
+        barmode="stack"
+    )
+
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    fig.update_layout(
+        xaxis_tickformat="%b %Y",
+        xaxis_tickangle=360                )
+
+    return fig
+
+
+CHARTS = [
+    {"title": "Share of Voice", "image": "https://plabs-assets.s3.us-west-1.amazonaws.com/share+of+voice(nKPI).png"},
+    {"title": "Audience Growth", "worksheet": 3, "build": plot_audience_growth,
+     "series": sheet_series("I1:J")},
+    {"title": "Engagement Rate", "worksheet": 3, "build": plot_engagement_rate,
+     "series": sheet_series("N1:O")},
+    {"title": "Email Subscribers", "worksheet": 3, "build": plot_email_subscribers,
+     "series": sheet_series("S1:T")},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
@@ -0,0 +1,21 @@
+"""
+Capital page: money raised by network organizations and their investors.
+"""
+from nkpi.render import render_charts
+from nkpi.sheets import sheet_chart, sheet_series
+
+
+CHARTS = [
+    {"title": "Capital Raised by PL Portfolio Venture Startups", "worksheet": 1, "build": sheet_chart("D1:E", "Amount"),
+     "series": sheet_series("D1:E")},
+    {"title": "Capital Raised by All Organizations in the Network", "worksheet": 1, "build": sheet_chart("I1:J", "Amount"),
+     "series": sheet_series("I1:J")},
+    {"title": "Angel Investors of Network Teams", "worksheet": 1, "build": sheet_chart("N1:O", "No. Of Investors"),
+     "series": sheet_series("N1:O")},
+    {"title": "VC Investors of Network Teams", "worksheet": 1, "build": sheet_chart("S1:T", "No. Of Investors"),
+     "series": sheet_series("S1:T")},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
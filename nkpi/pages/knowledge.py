@@ -0,0 +1,277 @@
+"""
+Knowledge page: office hours, knowledge contributed, network density and events.
+"""
+from concurrent.futures import TimeoutError
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from nkpi.async_queries import (
+    fetch_event_participation_member_data_async,
+    fetch_event_participation_team_data_async,
+    submit,
+)
+from nkpi.months import format_month_key, format_period_key, index_by_month, to_month_key
+from nkpi.queries import (
+    fetch_event_participation_member_data,
+    fetch_event_participation_team_data,
+    fetch_OH_data,
+)
+from nkpi.render import QUERY_TIMEOUT_SECONDS, render_charts, wait_for
+from nkpi.sheets import get_sheet_values, sheet_series
+
+
+def plot_office_hours(start_month=None, end_month=None, granularity="month"):
+    """Office hours link clicks per period, stacked by the page they were clicked on."""
+    df = fetch_OH_data(start_month, end_month, granularity)
+    if df.empty:
+        return None
+
+    df_long = df.rename(columns={"page_type": "Type", "interaction_count": "Value"})
+    df_long["Month-Year"] = format_period_key(df_long["month_key"], granularity).to_numpy()
+    df_long = df_long[df_long["Value"] > 0]
+
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Value",
+        color="Type",
+        labels={"Month-Year": "Month-Year", "Value": "Office Hours"},
+        height=500,
+        barmode="stack"
+    )
+
+    fig.update_traces(texttemplate='', hovertemplate='%{y:.0f}')
+    totals = df_long.groupby("Month-Year")["Value"].sum().reset_index()
+    fig.update_layout(
+        annotations=[
+            dict(
+                x=row["Month-Year"],
+                y=row["Value"]+1,
+                text=f"{int(row['Value'])}",
+                showarrow=False,
+                font=dict(size=12)
+            )
+            for _, row in totals.iterrows()
+        ],
+        xaxis=dict(type="category", tickmode="array", tickvals=df_long["Month-Year"].unique()),
+        xaxis_title="Month-Year",
+        yaxis_title="Office Hours",
+        showlegend=True
+    )
+    return fig
+
+
+def office_hours_series(start_month=None, end_month=None):
+    """Office hours link clicks per month, one series per page type."""
+    return fetch_OH_data(start_month, end_month).pivot_table(
+        index="month_key", columns="page_type", values="interaction_count", aggfunc="sum", observed=True
+    )
+
+
+def plot_knowledge_hours(worksheet, start_month=None, end_month=None):
+    """Hours of knowledge contributed per month, stacked by contribution type."""
+    data = get_sheet_values(worksheet, "L1:O", start_month, end_month)
+    if not data:
+        return None
+
+    columns = ['Month Year', '# of hours of blog reading', '# of hours of workshops/problem solving', '# of hours of OHs']
+    df = pd.DataFrame(data[1:], columns=columns)
+
+    df['month_key'] = to_month_key(df['Month Year'])
+    for col in columns[1:]:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df_pivot = df.pivot_table(index='month_key',
+                            values=['# of hours of blog reading', '# of hours of workshops/problem solving', '# of hours of OHs'],
+                            aggfunc='sum').reset_index()
+
+    df_pivot = df_pivot.dropna(subset=['# of hours of blog reading', '# of hours of workshops/problem solving', '# of hours of OHs'], how='all')
+    df_pivot = df_pivot.sort_values('month_key')
+
+    sorted_months = format_month_key(df_pivot['month_key'])
+    df_melted = df_pivot.melt(id_vars=['month_key'],
+                            value_vars=['# of hours of blog reading', '# of hours of workshops/problem solving', '# of hours of OHs'],
+                            var_name='type', value_name='hours')
+
+    df_melted['hours'] = df_melted['hours'].fillna(0)
+    fig = px.bar(df_melted, x='month_key', y='hours', color='type',
+                labels={'month_key': 'Month-Year', 'hours': 'Hours', 'type': 'Type'},
+                height=500)
+
+    fig.update_traces(texttemplate='', hovertemplate='%{y:.1f}')
+    totals = df_melted.groupby("month_key")["hours"].sum().reset_index()
+
+    fig.update_layout(
+        annotations=[
+            dict(
+                x=row["month_key"],
+                y=row["hours"]+ 3,
+                text=f"{row['hours']:.1f}",
+                showarrow=False,
+                font=dict(size=12)
+            )
+            for _, row in totals.iterrows()
+        ],
+        xaxis=dict(type="category", tickmode="array", tickvals=df_pivot["month_key"], ticktext=sorted_months),
+        xaxis_title="Month-Year",
+        yaxis_title="Total Hours",
+        showlegend=True
+    )
+    return fig
+
+
+def plot_network_density(worksheet, start_month=None, end_month=None):
+    """Network density by member and by team per month, as percentages."""
+    data = get_sheet_values(worksheet, "T1:V", start_month, end_month)
+    df = pd.DataFrame(data, columns=["Month Year", "Network Density by Member", "Network Density by Team"])
+
+    df["Network Density by Member"] = pd.to_numeric(df["Network Density by Member"], errors='coerce')
+    df["Network Density by Team"] = pd.to_numeric(df["Network Density by Team"], errors='coerce')
+
+    df = df.dropna(subset=["Network Density by Member", "Network Density by Team"])
+    df = index_by_month(df, "Month Year")
+
+    df_long = df.melt(
+        id_vars=["Month Year"],
+        value_vars=["Network Density by Member", "Network Density by Team"],
+        var_name="Type",
+        value_name="Count"
+    )
+
+    df_long = df_long[df_long["Count"] > 0]
+
+    fig = px.bar(
+        df_long,
+        x="Month Year",
+        y="Count",
+        text="Count",
+        color="Type",
+        labels={"Month Year": "Month Year", "Count": "% Network Density"},
+        barmode="group",
+        height=500
+    )
+
+    fig.update_traces(texttemplate='%{text:.2%}', textposition='outside')
+
+    fig.update_layout(
+        yaxis_tickformat='.0%',
+        xaxis_tickangle=360,
+    )
+    return fig
+
+
+def event_participation_series(df):
+    """Monthly counts from fetch_event_participation_data, one series per type."""
+    return df.pivot_table(index="month_key", columns="type", values="count", aggfunc="sum")
+
+
+def plot_event_participation(df_melted, granularity="month"):
+    """
+    Plots host, speaker and attendee counts per period as a stacked bar chart.
+
+    Args:
+        df_melted (DataFrame): Period-level output of fetch_event_participation_data.
+        granularity (str): The granularity df_melted was fetched at, used for the labels.
+    Returns:
+        Plotly Figure: The generated stacked bar chart, or None when there is no data.
+    """
+    if df_melted.empty:
+        return None
+
+    months = df_melted['month_key'].drop_duplicates()
+    sorted_months = format_period_key(months, granularity)
+
+    fig = px.bar(
+        df_melted,
+        x='month_key',
+        y='count',
+        color='type',
+        labels={'month_key': 'Month-Year', 'count': 'Count', 'type': 'Type'},
+        height=500
+    )
+    fig.update_traces(texttemplate='', hovertemplate='%{y:.0f}')
+    totals = df_melted.groupby('month_key')['count'].sum().reset_index()
+    fig.update_layout(
+        annotations=[
+            dict(
+                x=row['month_key'],
+                y=row['count'],
+                text=f"{int(row['count'])}",
+                showarrow=False,
+                font=dict(size=12),
+                xanchor='center',
+                yanchor='bottom'
+            )
+            for _, row in totals.iterrows()
+        ],
+        barmode='stack',
+        xaxis=dict(
+            type='category',
+            tickmode='array',
+            tickvals=months,
+            ticktext=sorted_months
+        ),
+        showlegend=True
+    )
+    return fig
+
+
+def render_event_drilldown(start_month=None, end_month=None):
+    """Per-event host, speaker and attendee counts for one month, behind a checkbox."""
+    months = fetch_event_participation_team_data(start_month, end_month)["month_key"].drop_duplicates()
+    if months.empty or not st.checkbox("Show per-event counts"):
+        return
+    selected_month = st.selectbox("Month", months, format_func=lambda key: format_month_key([key]).iloc[0])
+    guests = st.radio("Count distinct", ["Members", "Teams"], horizontal=True)
+    # Both are fetched at once, so switching between them doesn't query again.
+    future = submit(
+        fetch_event_participation_member_data_async(selected_month, selected_month, level="event"),
+        fetch_event_participation_team_data_async(selected_month, selected_month, level="event"),
+    )
+    try:
+        members, teams = wait_for(future, QUERY_TIMEOUT_SECONDS, from_start=False)
+    except TimeoutError:
+        future.cancel()
+        st.warning(f"Timed out after {QUERY_TIMEOUT_SECONDS} seconds.")
+        return
+    df_events = members if guests == "Members" else teams
+    st.dataframe(
+        df_events.pivot(index="event_uid", columns="type", values="count"),
+        width="stretch"
+    )
+
+
+CHARTS = [
+    {"title": "Office Hours Held (By Type)", "granularity": True, "build": plot_office_hours,
+     "series": office_hours_series},
+    # The header rows of these tables aren't month rows, so they are dropped like any other.
+    {"title": "Hours of knowledge Contributed", "worksheet": 4, "build": plot_knowledge_hours,
+     "series": sheet_series("L1:O", [
+         '# of hours of blog reading', '# of hours of workshops/problem solving', '# of hours of OHs'
+     ])},
+    {"title": "% Network Density", "worksheet": 4, "build": plot_network_density,
+     "series": sheet_series("T1:V", ["Network Density by Member", "Network Density by Team"])},
+    {"title": "Monthly Active Users by Contribution Type - Events",
+     "granularity": True,
+     "build": lambda start_month, end_month, granularity="month": plot_event_participation(
+         fetch_event_participation_member_data(start_month, end_month, granularity), granularity
+     ),
+     "series": lambda start_month, end_month: event_participation_series(
+         fetch_event_participation_member_data(start_month, end_month)
+     )},
+    {"title": "Monthly Active Teams by Contribution Type - Events",
+     "granularity": True,
+     "build": lambda start_month, end_month, granularity="month": plot_event_participation(
+         fetch_event_participation_team_data(start_month, end_month, granularity), granularity
+     ),
+     "series": lambda start_month, end_month: event_participation_series(
+         fetch_event_participation_team_data(start_month, end_month)
+     )},
+    {"title": "Event Participation by Event", "render": render_event_drilldown},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
@@ -0,0 +1,121 @@
+"""
+Memory page (admins only): what the dashboard's caches and sessions hold, by size.
+"""
+import time
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching import get_data_cache_stats_provider, get_resource_cache_stats_provider
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.stats import CACHE_MEMORY_FAMILY
+
+from nkpi.cache import get_result_cache
+from nkpi.frames import frame_bytes
+from nkpi.queries import get_rollups
+from nkpi.sessions import session_accounts
+
+
+def cache_stats():
+    """
+    Streamlit's cache memory stats as CacheStat tuples, one per entry.
+
+    With a running server these include every session's session_state; without one
+    (e.g. under AppTest) only st.cache_data and st.cache_resource are reported.
+    """
+    if Runtime.exists():
+        return Runtime.instance().stats_mgr.get_stats([CACHE_MEMORY_FAMILY]).get(CACHE_MEMORY_FAMILY, [])
+    stats = []
+    for provider in (get_data_cache_stats_provider(), get_resource_cache_stats_provider()):
+        stats.extend(provider.get_stats().get(CACHE_MEMORY_FAMILY, []))
+    return stats
+
+
+def cache_entries():
+    """Cache entries grouped by category and cached function, largest first."""
+    df = pd.DataFrame(cache_stats(), columns=["category", "name", "bytes"])
+    return (
+        df.groupby(["category", "name"], as_index=False)
+        .agg(entries=("bytes", "size"), bytes=("bytes", "sum"))
+        .sort_values("bytes", ascending=False, ignore_index=True)
+    )
+
+
+def shared_results():
+    """Query results in the shared result cache, largest first."""
+    cache = get_result_cache()
+    with cache["lock"]:
+        entries = dict(cache["entries"])
+    rows = [
+        {
+            "query": " ".join(query.split())[:80],
+            "params": ", ".join(f"{name}={value}" for name, value in params),
+            "rows": entry["table"].num_rows,
+            "bytes": entry["table"].nbytes,
+        }
+        for (query, params, _), entry in entries.items()
+    ]
+    return pd.DataFrame(rows, columns=["query", "params", "rows", "bytes"]).sort_values("bytes", ascending=False, ignore_index=True)
+
+
+def rollup_frames():
+    """The process-wide rollups kept by refresh_rollup, largest first."""
+    rollups = get_rollups()
+    with rollups["lock"]:
+        tables = dict(rollups["tables"])
+    rows = [
+        {"rollup": name, "rows": len(rollup["counts"]), "bytes": frame_bytes(rollup["counts"])}
+        for name, rollup in tables.items()
+    ]
+    return pd.DataFrame(rows, columns=["rollup", "rows", "bytes"]).sort_values("bytes", ascending=False, ignore_index=True)
+
+
+def session_frames():
+    """DataFrames held in this session's st.session_state, largest first."""
+    rows = [
+        {"key": str(key), "rows": len(value), "bytes": frame_bytes(value)}
+        for key, value in st.session_state.items()
+        if isinstance(value, pd.DataFrame)
+    ]
+    return pd.DataFrame(rows, columns=["key", "rows", "bytes"]).sort_values("bytes", ascending=False, ignore_index=True)
+
+
+def sessions():
+    """Every session's account, heaviest first, with this session marked."""
+    now = time.time()
+    current = get_script_run_ctx().session_id
+    rows = [
+        {
+            "user": account["username"] + (" (you)" if session_id == current else ""),
+            "page": account["page"],
+            "idle seconds": round(now - account["last_active"]),
+            "reruns": account["reruns"],
+            "cpu seconds": round(account["cpu_seconds"], 2),
+            "figures": len(account["figures"]),
+            "bytes": sum(account["figures"].values()) + account["frame_bytes"],
+        }
+        for session_id, account in session_accounts().items()
+    ]
+    columns = ["user", "page", "idle seconds", "reruns", "cpu seconds", "figures", "bytes"]
+    return pd.DataFrame(rows, columns=columns).sort_values(["bytes", "cpu seconds"], ascending=False, ignore_index=True)
+
+
+def render(start_month=None, end_month=None):
+    st.header("Memory")
+    # Clicking reruns the page, which is all a refresh needs.
+    st.button("Refresh")
+
+    sections = [
+        ("Cache entries", cache_entries),
+        ("Shared query results", shared_results),
+        ("Rollups", rollup_frames),
+        ("Session state frames", session_frames),
+        ("Sessions", sessions),
+    ]
+    for title, report in sections:
+        df = report()
+        st.subheader(f"{title} ({df['bytes'].sum() / 2**20:.1f} MiB)")
+        if df.empty:
+            st.info("Nothing held.")
+        else:
+            st.dataframe(df, width="stretch", hide_index=True)
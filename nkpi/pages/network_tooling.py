@@ -0,0 +1,184 @@
+"""
+Network Tooling page: directory usage and team, member and project growth.
+"""
+import pandas as pd
+import plotly.express as px
+
+from nkpi.months import format_period_key, index_by_month
+from nkpi.queries import fetch_member_data, fetch_project_data, fetch_team_data
+from nkpi.render import render_charts
+from nkpi.sheets import get_sheet_values, read_series, sheet_series
+
+
+def plot_monthly_active_users(worksheet, start_month=None, end_month=None):
+    """Monthly active users per type, stacked, with the monthly total above each bar."""
+    data = get_sheet_values(worksheet, 'D1:F', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+
+    if "Month Year" in df.columns:
+        df.rename(columns={"Month Year": "Month-Year"}, inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = index_by_month(df)
+
+    df_long = df.melt(
+        id_vars="Month-Year",
+        value_vars=[col for col in df.columns if col != "Month-Year"],
+        var_name="Type",
+        value_name="Value"
+    )
+    df_long = df_long[df_long["Value"] > 0]
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Value",
+        color="Type",
+        labels={"Month-Year": "Month-Year", "Value": "Count"},
+        height=500,
+        barmode="stack"
+    )
+    fig.update_traces(texttemplate='', hovertemplate='%{y:.0f}')
+    totals = df_long.groupby("Month-Year")["Value"].sum().reset_index()
+    fig.update_layout(
+        annotations=[
+            dict(
+                x=row["Month-Year"],
+                y=row["Value"]+70,
+                text=f"{int(row['Value'])}",
+                showarrow=False,
+                font=dict(size=12)
+            )
+            for _, row in totals.iterrows()
+        ],
+        xaxis=dict(
+            type="category",
+            tickmode="array",
+            tickvals=df_long["Month-Year"]
+        ),
+        xaxis_title="Month-Year",
+        xaxis_tickangle=45,
+        yaxis_title="Count",
+        showlegend=True
+    )
+    return fig
+
+
+def to_minutes(duration):
+    """Durations stored as minutes.seconds in the sheet, e.g. 3.25 for 3 min 25 s, as minutes."""
+    duration = pd.to_numeric(duration, errors='coerce')
+    return duration // 1 + (duration % 1 * 100).round() / 60
+
+
+def plot_session_duration(worksheet, start_month=None, end_month=None):
+    """Average session duration per month, as minutes."""
+    data = get_sheet_values(worksheet, 'J1:K', start_month, end_month)
+    if not data:
+        return None
+
+    df = index_by_month(pd.DataFrame(data[1:], columns=data[0]), "Month Year")
+    df['Minutes'] = to_minutes(df['Time (Min.Sec)'])
+    fig = px.line(df, x='Month Year', y='Minutes', markers=True,
+                labels={'Month Year': 'Month-Year', 'Minutes': 'Min & Sec)'},
+                )
+    fig.update_layout(xaxis_tickformat='%b %Y', xaxis_title='Month-Year', yaxis_title='Min & Sec')
+    return fig
+
+
+def session_duration_series(worksheet, start_month=None, end_month=None):
+    df = read_series(worksheet, 'J1:K', start_month, end_month)
+    return pd.DataFrame({"Avg Session Minutes": to_minutes(df['Time (Min.Sec)'])})
+
+
+def growth_series(df, entity):
+    """New and total entries per month from a monthly growth frame, as series."""
+    return df.set_index("month_key")[["new_entries", "total_entries"]].rename(
+        columns={"new_entries": f"New {entity}", "total_entries": f"Total {entity}"}
+    )
+
+
+def plot_growth(df, entity, granularity="month"):
+    """
+    Plots new vs existing entries per period from a growth frame as a stacked bar chart.
+
+    Args:
+        df (DataFrame): Output of fetch_growth_data with month_key, new_entries,
+            existing_entries and total_entries columns.
+        entity (str): Plural name of what is counted, e.g. "Teams".
+        granularity (str): The granularity df was fetched at, used for the labels.
+    Returns:
+        Plotly Figure: The generated stacked bar chart.
+    """
+    new_col, existing_col = f"New {entity}", f"Existing {entity}"
+    df = df.sort_values("month_key").rename(columns={"new_entries": new_col, "existing_entries": existing_col})
+    df["Month-Year"] = format_period_key(df["month_key"], granularity).to_numpy()
+
+    df_melted = df.melt(
+        id_vars=["Month-Year"],
+        value_vars=[new_col, existing_col],
+        var_name=f"{entity} Type",
+        value_name="Count"
+    )
+
+    fig = px.bar(
+        df_melted,
+        x="Month-Year",
+        y="Count",
+        color=f"{entity} Type",
+        labels={"Month-Year": "Month-Year", "Count": f"{entity} Count", f"{entity} Type": "Category"},
+        height=500,
+        barmode="stack"
+    )
+    fig.update_traces(texttemplate='', hovertemplate='%{y:.0f}')
+    fig.update_layout(
+        annotations=[
+            dict(
+                x=row["Month-Year"],
+                y=row["total_entries"],
+                text=f"{int(row['total_entries'])}",
+                showarrow=False,
+                font=dict(size=12),
+                xanchor="center",
+                yanchor="bottom"
+            )
+            for _, row in df.iterrows()
+        ],
+        xaxis=dict(type="category", tickmode="array", tickvals=df["Month-Year"]),
+        xaxis_title="Month-Year",
+        yaxis_title=f"{entity} Count",
+        showlegend=True
+    )
+    return fig
+
+
+CHARTS = [
+    {"title": "Monthly Active Users", "worksheet": 5, "build": plot_monthly_active_users,
+     "series": sheet_series("D1:F")},
+    {"title": "Avg Session Duration", "worksheet": 5, "build": plot_session_duration,
+     "series": session_duration_series},
+    {"title": "Team Growth", "granularity": True,
+     "build": lambda start_month, end_month, granularity="month": plot_growth(
+         fetch_team_data(start_month, end_month, granularity), "Teams", granularity
+     ),
+     "series": lambda start_month, end_month: growth_series(fetch_team_data(start_month, end_month), "Teams")},
+    {"title": "Member Growth", "granularity": True,
+     "build": lambda start_month, end_month, granularity="month": plot_growth(
+         fetch_member_data(start_month, end_month, granularity), "Members", granularity
+     ),
+     "series": lambda start_month, end_month: growth_series(fetch_member_data(start_month, end_month), "Members")},
+    {"title": "Project Growth", "granularity": True,
+     "build": lambda start_month, end_month, granularity="month": plot_growth(
+         fetch_project_data(start_month, end_month, granularity), "Projects", granularity
+     ),
+     "series": lambda start_month, end_month: growth_series(fetch_project_data(start_month, end_month), "Projects")},
+    {"title": "NPS Feedback", "image": "https://plabs-assets.s3.us-west-1.amazonaws.com/NPS+Feedback(nKPI).png"},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
@@ -0,0 +1,77 @@
+"""
+Other Networks page: networks engaged or building with PL.
+"""
+import pandas as pd
+import plotly.express as px
+
+from nkpi.render import render_charts
+from nkpi.sheets import get_sheet_values, sheet_series
+
+
+def plot_engaged_networks(worksheet, start_month=None, end_month=None):
+    """Networks engaged with PL per month."""
+    data = get_sheet_values(worksheet, 'D1:E', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df.rename(columns={"Month Year": "Month-Year", "Data": "Value"}, inplace=True)
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df[df["Value"] > 0]
+
+    fig = px.bar(
+        df,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "No. of Network"},
+        height=500
+    )
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    return fig
+
+
+def plot_participating_networks(worksheet, start_month=None, end_month=None):
+    """Networks building or participating with PL programs per month."""
+    data = get_sheet_values(worksheet, 'I1:J', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df.rename(columns={"Month Year": "Month-Year", "Data": "Value"}, inplace=True)
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df[df["Value"] > 0]
+
+    fig = px.bar(
+        df,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "No. of Network"},
+        height=500
+    )
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    return fig
+
+
+CHARTS = [
+    {"title": "Networks Engaged with PL", "worksheet": 10, "build": plot_engaged_networks,
+     "series": sheet_series("D1:E")},
+    {"title": "Networks Building/Participating with PL Programs", "worksheet": 10, "build": plot_participating_networks,
+     "series": sheet_series("I1:J")},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
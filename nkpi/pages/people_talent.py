@@ -0,0 +1,138 @@
+"""
+People/Talent page: active people, new hires and talent levels in the network.
+"""
+import pandas as pd
+import plotly.express as px
+
+from nkpi.months import index_by_month
+from nkpi.render import render_charts
+from nkpi.sheets import get_sheet_values, sheet_series
+
+
+def plot_active_people(worksheet, start_month=None, end_month=None):
+    """Active people in the network per month."""
+    data = get_sheet_values(worksheet, 'D1:E', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df.rename(columns={"Month Year": "Month-Year", "Data": "Value"}, inplace=True)
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+    df['Value'] = pd.to_numeric(df['Value'], errors='coerce')
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+
+    df = df[df['Value'] > 0]
+
+    fig = px.bar(
+        df,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "Active People Count"},
+        height=500
+    )
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    return fig
+
+
+def plot_new_hires(worksheet, start_month=None, end_month=None):
+    """New hires into the network per month."""
+    data = get_sheet_values(worksheet, 'N1:O', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df.rename(columns={"Month Year": "Month-Year", "Data": "Value"}, inplace=True)
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+    df['Value'] = pd.to_numeric(df['Value'], errors='coerce')
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+
+    df = df[df['Value'] > 0]
+    fig = px.bar(
+        df,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "Network New Hires"},
+        height=500
+    )
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    return fig
+
+
+def plot_talent_levels(worksheet, start_month=None, end_month=None):
+    """Monthly talent per team level."""
+    data = get_sheet_values(worksheet, 'S1:W', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+
+    if "Month Year" in df.columns:
+        df.rename(columns={"Month Year": "Month-Year"}, inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = index_by_month(df)
+
+    df_long = df.melt(
+        id_vars="Month-Year",
+        value_vars=[col for col in df.columns if col != "Month-Year"],
+        var_name="Type",
+        value_name="Value"
+    )
+
+    df_long = df_long[df_long["Value"] > 0]
+    totals = df_long.groupby("Month-Year")["Value"].sum().reset_index()
+
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Value",
+        color="Type",
+        hover_name="Type",
+        labels={"Month-Year": "Month-Year", "Value": "Monthly Talent"},
+        height=500,
+        barmode="stack"
+    )
+    fig.update_traces(text=None, hovertemplate='%{y:.0f}')
+    fig.update_layout(
+        annotations=[
+            dict(
+                x=row["Month-Year"],
+                y=row["Value"] + 10,
+                text=f"{int(row['Value'])}",
+                showarrow=False,
+                font=dict(size=12),
+                xanchor="center",
+                yanchor="bottom"
+            )
+            for _, row in totals.iterrows()
+        ],
+        xaxis_tickformat="%b %Y",
+        xaxis_tickangle=360,
+        xaxis_title="Month-Year",
+        yaxis_title="Monthly Talent",
+        legend_title="Team Level",
+        height=500,
+    )
+
+    return fig
+
+
+CHARTS = [
+    {"title": "# of Active People in the Network", "worksheet": 6, "build": plot_active_people,
+     "series": sheet_series("D1:E")},
+    {"title": "Monthly New Hires into the Network", "worksheet": 6, "build": plot_new_hires,
+     "series": sheet_series("N1:O")},
+    {"title": "Monthly Talent / Level Growth", "worksheet": 6, "build": plot_talent_levels,
+     "series": sheet_series("S1:W")},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
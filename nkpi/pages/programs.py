@@ -0,0 +1,56 @@
+"""
+Programs page: program impact scores and ROI.
+"""
+import pandas as pd
+import plotly.express as px
+
+from nkpi.months import index_by_month
+from nkpi.render import render_charts
+from nkpi.sheets import get_sheet_values, sheet_chart, sheet_series
+
+
+def plot_program_roi(worksheet, start_month=None, end_month=None):
+    """Program cost per month, for comparing against impact."""
+    data = get_sheet_values(worksheet, 'AF1:AG', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df.rename(columns={"Month Year": "Month-Year", "Data": "Value"}, inplace=True)
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+    df = index_by_month(df)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df[df["Value"] > 0]
+
+    fig = px.line(
+        df,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "Cost($)"},
+        height=500
+    )
+
+    fig.update_traces(
+        texttemplate='%{text}',
+        textposition='top center',
+        mode='lines+markers+text'
+    )
+
+    return fig
+
+
+CHARTS = [
+    {"title": "Monthly Aggregated Program Impact Scores", "worksheet": 8, "build": sheet_chart("D1:E", "Data"),
+     "series": sheet_series("D1:E")},
+    {"title": "Program ROI (Imapct vs Cost)", "worksheet": 8, "build": plot_program_roi,
+     "series": sheet_series("AF1:AG")},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
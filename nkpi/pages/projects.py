@@ -0,0 +1,72 @@
+"""
+Projects page: project contributors and adoption.
+"""
+import pandas as pd
+import plotly.express as px
+
+from nkpi.months import index_by_month
+from nkpi.render import render_charts
+from nkpi.sheets import get_sheet_values, sheet_chart, sheet_series
+
+
+def plot_project_adoption(worksheet, start_month=None, end_month=None):
+    """Project stars, forks and repos per month."""
+    data = get_sheet_values(worksheet, 'I1:M', start_month, end_month)
+    if not (data and len(data) > 1):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+
+    if "Month Year" in df.columns:
+        df.rename(columns={"Month Year": "Month-Year"}, inplace=True)
+
+    for col in ["Projects", "Stars", "Forks", "Repos"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df.dropna(subset=["Month-Year", "Projects", "Stars", "Forks", "Repos"], inplace=True)
+    df = index_by_month(df)
+
+    df_long = df.melt(
+        id_vars=["Month-Year"],
+        value_vars=["Projects", "Stars", "Forks", "Repos"],
+        var_name="Type",
+        value_name="Count"
+    )
+
+    df_long = df_long[df_long["Count"] > 0]
+
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Count",
+        text="Count",
+        color="Type",
+        labels={"Month-Year": "Month-Year", "Count": "Value"},
+        barmode="group",
+        height=500
+    )
+
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    fig.update_layout(
+        xaxis_tickangle=-45,
+        xaxis_title="Month-Year",
+        yaxis_title="Value",
+        legend_title="Metric Type",
+        height=500,
+    )
+
+    return fig
+
+
+CHARTS = [
+    {"title": "Project Contributors by Month", "worksheet": 7, "build": sheet_chart("D1:E", "Active People Count"),
+     "series": sheet_series("D1:E")},
+    {"title": "Project Adoption:  Stars, Forks, and Repos", "worksheet": 7, "build": plot_project_adoption,
+     "series": sheet_series("I1:M")},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
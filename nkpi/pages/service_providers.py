@@ -0,0 +1,77 @@
+"""
+Service Providers page: providers listed on network tools and matched.
+"""
+import pandas as pd
+import plotly.express as px
+
+from nkpi.render import render_charts
+from nkpi.sheets import get_sheet_values, sheet_series
+
+
+def plot_listed_service_providers(worksheet, start_month=None, end_month=None):
+    """Service providers listed on network tools per month."""
+    data = get_sheet_values(worksheet, 'I1:J', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df.rename(columns={"Month Year": "Month-Year", "Data": "Value"}, inplace=True)
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df[df["Value"] > 0]
+
+    fig = px.bar(
+        df,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "No. of Service Providers"},
+        height=500
+    )
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    return fig
+
+
+def plot_matched_service_providers(worksheet, start_month=None, end_month=None):
+    """Service providers matched within 6 months, per month."""
+    data = get_sheet_values(worksheet, 'N1:O', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df.rename(columns={"Month Year": "Month-Year", "Data": "Value"}, inplace=True)
+    df.dropna(subset=["Month-Year", "Value"], inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    df = df[df["Value"] > 0]
+
+    fig = px.bar(
+        df,
+        x="Month-Year",
+        y="Value",
+        text="Value",
+        labels={"Month-Year": "Month-Year", "Value": "No. of Service Providers"},
+        height=500
+    )
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    return fig
+
+
+CHARTS = [
+    {"title": "Service Providers: Listed on Network Tools", "worksheet": 9, "build": plot_listed_service_providers,
+     "series": sheet_series("I1:J")},
+    {"title": "Service Providers:  Match within 6 months", "worksheet": 9, "build": plot_matched_service_providers,
+     "series": sheet_series("N1:O")},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
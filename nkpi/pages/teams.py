@@ -0,0 +1,179 @@
+"""
+Teams page: stage changes, membership tiers and impact tiers of network teams.
+"""
+import pandas as pd
+import plotly.express as px
+
+from nkpi.months import index_by_month
+from nkpi.render import render_charts
+from nkpi.sheets import get_sheet_values, sheet_series
+
+
+def plot_team_stages(worksheet, start_month=None, end_month=None):
+    """Teams that shut down, stayed at the same stage or moved up, per month."""
+    data = get_sheet_values(worksheet, 'D1:G', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    if "Month Year" in df.columns:
+        df.rename(columns={"Month Year": "Month-Year"}, inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = index_by_month(df)
+
+    df_long = df.melt(
+        id_vars="Month-Year",
+        value_vars=[col for col in df.columns if col != "Month-Year"],
+        var_name="Type",
+        value_name="Value"
+    )
+    df_long = df_long[df_long["Value"] > 0]
+
+    # Create stacked bar chart
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Value",
+        color="Type",
+        # text="",  # Hide individual stack values
+        labels={"Month-Year": "Month-Year", "Value": "No. Of Teams"},
+        height=500,
+        barmode="stack"
+    )
+
+    # Compute totals for each bar
+    totals = df_long.groupby("Month-Year")["Value"].sum().reset_index()
+
+    # Add total annotations
+    annotations = []
+    for i, row in totals.iterrows():
+        annotations.append(
+            dict(
+                x=row["Month-Year"],
+                y=row["Value"]+0.2,  # Adjust the position above the bar
+                text=f"{int(row['Value'])}",
+                showarrow=False,
+                font=dict(size=14,family="Arial Bold")
+            )
+        )
+
+    fig.update_layout(
+        xaxis_tickformat="%b %Y",
+        xaxis_tickangle=360,
+        annotations=annotations
+    )
+
+    return fig
+
+
+def plot_team_membership_tiers(worksheet, start_month=None, end_month=None):
+    """Teams per membership tier, per month."""
+    data = get_sheet_values(worksheet, 'K1:N', start_month, end_month)
+    if not (data and len(data[0]) >= 2):
+        return None
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    if "Month Year" in df.columns:
+        df.rename(columns={"Month Year": "Month-Year"}, inplace=True)
+
+    for col in df.columns:
+        if col != "Month-Year":
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = index_by_month(df)
+
+    df_long = df.melt(
+        id_vars="Month-Year",
+        value_vars=[col for col in df.columns if col != "Month-Year"],
+        var_name="Type",
+        value_name="Value"
+    )
+    df_long = df_long[df_long["Value"] > 0]
+
+    # Create stacked bar chart
+    fig = px.bar(
+        df_long,
+        x="Month-Year",
+        y="Value",
+        color="Type",
+        # text="",  # Hide individual stack values
+        labels={"Month-Year": "Month-Year", "Value": "No. Of Teams"},
+        height=500,
+        barmode="stack"
+    )
+
+    # Compute totals for each bar
+    totals = df_long.groupby("Month-Year")["Value"].sum().reset_index()
+
+    # Add total annotations
+    annotations = []
+    for i, row in totals.iterrows():
+        annotations.append(
+            dict(
+                x=row["Month-Year"],
+                y=row["Value"] + 13,  # Adjust the position above the bar
+                text=f"{int(row['Value'])}",
+                showarrow=False,
+                font=dict(size=14, family="Arial Bold")
+            )
+        )
+
+    fig.update_layout(
+        xaxis_tickformat="%b %Y",
+        annotations=annotations
+    )
+
+    return fig
+
+
+def plot_team_impact_tiers(worksheet, start_month=None, end_month=None):
+    """Teams per impact tier, comparing two quarters."""
+    data = get_sheet_values(worksheet, 'V3:X', start_month, end_month)
+    if not (data and len(data) > 1):
+        return None
+
+    df = pd.DataFrame(data, columns=["Stage", "Q4 2024", "Q2 2024"])
+
+    df["Q4 2024"] = pd.to_numeric(df["Q4 2024"], errors='coerce')
+    df["Q2 2024"] = pd.to_numeric(df["Q2 2024"], errors='coerce')
+
+    df_long = df.melt(
+        id_vars=["Stage"],
+        value_vars=["Q4 2024", "Q2 2024"],
+        var_name="Quarter",
+        value_name="Count"
+    )
+
+    df_long = df_long[df_long["Count"] > 0]
+
+    fig = px.bar(
+        df_long,
+        x="Stage",
+        y="Count",
+        text="Count",
+        color="Quarter",
+        labels={"Stage": "Stage", "Count": "No. Of Teams"},
+        barmode="group",
+        height=500
+    )
+
+    fig.update_traces(texttemplate='%{text}', textposition='outside')
+
+    return fig
+
+
+CHARTS = [
+    {"title": "Shut down, Same stage, and Moved up", "worksheet": 2, "build": plot_team_stages,
+     "series": sheet_series("D1:G")},
+    {"title": "Teams by Membership Tier", "worksheet": 2, "build": plot_team_membership_tiers,
+     "series": sheet_series("K1:N")},
+    {"title": "Teams by Impact Tier", "worksheet": 2, "build": plot_team_impact_tiers},
+]
+
+
+def render(start_month=None, end_month=None):
+    render_charts(CHARTS, start_month, end_month)
@@ -0,0 +1,91 @@
+"""
+User/Customers page: the latest value and trend of every KPI on the other pages.
+
+The summary is built only from what the caches already hold (see
+nkpi.cache.cached_only), so showing it never queries Postgres or the spreadsheet.
+A KPI appears once its page has been viewed, by any session, for the same date
+range.
+"""
+import importlib
+
+import pandas as pd
+import streamlit as st
+
+from nkpi.cache import NotCached, cached_only
+from nkpi.metrics import METRICS, derived_metrics, latest_metrics
+from nkpi.pages import PAGES
+from nkpi.sheets import get_worksheet
+
+TREND_MONTHS = 12
+
+
+def chart_series(chart, start_month=None, end_month=None):
+    """A chart's series from the caches; raises NotCached when they aren't all there."""
+    with cached_only():
+        if "worksheet" in chart:
+            return chart["series"](get_worksheet(chart["worksheet"]), start_month, end_month)
+        return chart["series"](start_month, end_month)
+
+
+def kpi_name(chart, series, single):
+    """A chart's title, followed by the series name when the chart has several."""
+    return chart["title"] if single else f"{chart['title']}: {series}"
+
+
+def summary(start_month=None, end_month=None):
+    """
+    One row per series of every chart on the other pages with a cached source: its
+    latest month, value, growth and the values of the last TREND_MONTHS months. Also
+    returns the titles of the charts with nothing cached yet, and of those without a
+    monthly series to summarise (images, breakdowns by tier or by event).
+    """
+    rows, missing, unsummarised = [], [], []
+    for page, module_name in PAGES.items():
+        if module_name == __name__:
+            continue
+        for chart in importlib.import_module(module_name).CHARTS:
+            if "series" not in chart:
+                unsummarised.append(f"{page}: {chart['title']}")
+                continue
+            try:
+                series = chart_series(chart, start_month, end_month)
+            except NotCached:
+                missing.append(f"{page}: {chart['title']}")
+                continue
+            values = derived_metrics(series)["value"]
+            latest = latest_metrics(series)
+            for row in latest.to_dict("records"):
+                trend = values[row["Series"]].dropna().tail(TREND_MONTHS)
+                rows.append({
+                    "Page": page,
+                    "KPI": kpi_name(chart, row["Series"], len(latest) == 1),
+                    "Month": row["Month"],
+                    **{label: row[label] for label in (METRICS["value"], METRICS["mom"], METRICS["yoy"])},
+                    "Trend": trend.tolist(),
+                })
+    columns = ["Page", "KPI", "Month", METRICS["value"], METRICS["mom"], METRICS["yoy"], "Trend"]
+    return pd.DataFrame(rows, columns=columns), missing, unsummarised
+
+
+def render(start_month=None, end_month=None):
+    st.header("Headline KPIs")
+    df, missing, unsummarised = summary(start_month, end_month)
+    if df.empty:
+        st.info("No KPI data loaded yet. Open the other pages to load theirs.")
+    else:
+        percent = st.column_config.NumberColumn(format="percent")
+        st.dataframe(
+            df,
+            hide_index=True,
+            width="stretch",
+            column_config={
+                METRICS["value"]: st.column_config.NumberColumn(format="localized"),
+                METRICS["mom"]: percent,
+                METRICS["yoy"]: percent,
+                "Trend": st.column_config.LineChartColumn(f"Last {TREND_MONTHS} months"),
+            }
+        )
+    if missing:
+        st.caption(f"Not loaded yet, open their pages to include them: {', '.join(missing)}.")
+    if unsummarised:
+        st.caption(f"Not summarised, as they have no monthly series, see their pages: {', '.join(unsummarised)}.")
@@ -0,0 +1,132 @@
+"""
+Opt-in sampling profiler for slow reruns.
+
+Turned on for every session with NKPI_PROFILE=1, or for their own session by an
+admin from the sidebar. A profiled rerun is sampled every PROFILE_INTERVAL_SECONDS
+across the threads working for it: the script thread, the parallel chart fragments
+and the chart pool. Only full reruns are profiled; a widget that reruns a single
+chart block does not go through main().
+
+When a profiled rerun takes at least NKPI_PROFILE_SECONDS, two files are written
+to NKPI_PROFILE_DIR, named after the time, the page and the duration:
+
+    <name>.folded  one "thread;frame;frame... count" line per stack, the input of
+                   flamegraph.pl, inferno or speedscope
+    <name>.json    the page, the duration and the spans recorded with span()
+"""
+import contextlib
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+PROFILE_ALWAYS = os.getenv("NKPI_PROFILE") == "1"
+PROFILE_DIR = os.getenv("NKPI_PROFILE_DIR", "profiles")
+PROFILE_SECONDS = float(os.getenv("NKPI_PROFILE_SECONDS", "3"))
+PROFILE_INTERVAL_SECONDS = 0.005
+
+# The profile of the rerun the current thread works for. Parallel fragments run in
+# a copy of the script thread's context, so they see it too.
+active_profile = contextvars.ContextVar("active_profile", default=None)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Records how long the enclosed block took in the active profile, if any."""
+    profile = active_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile["spans"].append({
+            "name": name,
+            "thread": threading.current_thread().name,
+            "start": round(started - profile["started"], 4),
+            "seconds": round(time.perf_counter() - started, 4),
+        })
+
+
+def thread_label(thread):
+    """A thread's name without its pool and worker numbers, e.g. "nkpi-chart"."""
+    return re.sub(r"[-_]\d+(_\d+)?$", "", thread.name)
+
+
+def sample(profile, ctx, stop):
+    """Counts the stacks of the threads attached to ctx until stop is set."""
+    while not stop.wait(PROFILE_INTERVAL_SECONDS):
+        threads = {
+            thread.ident: thread for thread in threading.enumerate()
+            if getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None) is ctx
+        }
+        for ident, frame in sys._current_frames().items():
+            # Idle pool threads keep the context of the last chart they built.
+            if ident not in threads or frame.f_code.co_name == "_worker":
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            profile["stacks"][";".join([thread_label(threads[ident]), *reversed(stack)])] += 1
+
+
+def write_profile(profile, seconds):
+    """Writes the .folded and .json files for a profile and returns their path without extension."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    page = re.sub(r"[^a-z0-9]+", "-", profile["page"].lower()).strip("-")
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{page}-{seconds * 1000:.0f}ms")
+    with open(f"{path}.folded", "w") as folded:
+        for stack, count in profile["stacks"].most_common():
+            folded.write(f"{stack} {count}\n")
+    with open(f"{path}.json", "w") as summary:
+        json.dump({
+            "page": profile["page"],
+            "seconds": round(seconds, 4),
+            "samples": sum(profile["stacks"].values()),
+            "spans": sorted(profile["spans"], key=lambda span: span["start"]),
+        }, summary, indent=2)
+    return path
+
+
+@contextlib.contextmanager
+def profiled_rerun(page, enabled):
+    """
+    Profiles the enclosed rerun of `page` when enabled, including the parallel chart
+    fragments it starts, and yields a dict whose "path" is set once a profile has
+    been written for it.
+    """
+    result = {"path": None}
+    ctx = get_script_run_ctx()
+    if not enabled or ctx is None:
+        yield result
+        return
+
+    profile = {"page": page, "spans": [], "stacks": Counter(), "started": time.perf_counter()}
+    token = active_profile.set(profile)
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample, args=(profile, ctx, stop), name="nkpi-profiler", daemon=True)
+    sampler.start()
+    try:
+        yield result
+        # Chart fragments are still running on their own threads; wait for them,
+        # as Streamlit would right after the script, so they are part of the profile.
+        if ctx.parallel_coordinator is not None:
+            with span("parallel fragments"):
+                ctx.parallel_coordinator.join()
+    finally:
+        stop.set()
+        sampler.join()
+        active_profile.reset(token)
+        seconds = time.perf_counter() - profile["started"]
+        if seconds >= PROFILE_SECONDS:
+            result["path"] = write_profile(profile, seconds)
@@ -0,0 +1,876 @@
+"""
+Database access and the fetch_* queries behind the dashboard's SQL charts.
+
+Reads can be routed to Postgres read replicas listed in DB_REPLICA_URLS (comma
+separated SQLAlchemy URLs). Each replica's health and replication lag are checked
+at most every REPLICA_CHECK_SECONDS; queries go to the healthy replica least
+behind the primary, unless every replica is down or further behind than
+DB_REPLICA_MAX_LAG_SECONDS (default 5 minutes), in which case they go to DB_URL.
+A replica that fails to connect, or drops its connection mid-query, is marked
+down and the query is retried on the primary.
+
+Every result notes where it was read from and how far behind the primary that
+server was (see recording_sources), so charts can show it.
+"""
+import contextlib
+import contextvars
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+
+from nkpi.cache import NotCached, cache_only, cached_result
+from nkpi.frames import compact_frame
+from nkpi.months import GRANULARITIES, in_month_range, period_key, to_month_start
+from nkpi_mirror import mirror_available, query_mirror
+
+REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 5 * 60))
+REPLICA_CHECK_SECONDS = 30
+REPLICA_CONNECT_TIMEOUT_SECONDS = 3
+
+# Seconds since the last transaction replayed from the primary, or 0 when nothing
+# is waiting to be replayed (an idle primary sends no new transactions) or when the
+# server isn't a standby.
+REPLICATION_LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+# The sources noted by the queries of the current build, see recording_sources.
+read_sources = contextvars.ContextVar("read_sources", default=None)
+# Whose statements the current thread runs, see owning_queries.
+query_owner = contextvars.ContextVar("query_owner", default=None)
+
+
+@st.cache_resource
+def get_database_connection():
+    DATABASE_URL = os.getenv("DB_URL") 
+    if not DATABASE_URL:
+        raise RuntimeError("Environment variable DB_URL is not set.")
+    return create_engine(DATABASE_URL)
+
+
+@st.cache_resource
+def get_replicas():
+    """One entry per DB_REPLICA_URLS: its engine and the outcome of its last health check."""
+    return [
+        {
+            "name": f"replica {number}",
+            "engine": create_engine(url, connect_args={"connect_timeout": REPLICA_CONNECT_TIMEOUT_SECONDS}),
+            "lock": threading.Lock(),
+            "healthy": False,
+            "lag_seconds": None,
+            "checked_at": 0,
+            "error": None,
+        }
+        for number, url in enumerate(REPLICA_URLS, 1)
+    ]
+
+
+def check_replica(replica):
+    """Refreshes a replica's health and lag, unless it was checked less than REPLICA_CHECK_SECONDS ago."""
+    if time.time() - replica["checked_at"] < REPLICA_CHECK_SECONDS:
+        return
+    # While one thread checks, the others go on with the last outcome.
+    if not replica["lock"].acquire(blocking=False):
+        return
+    try:
+        with replica["engine"].connect() as connection:
+            lag = connection.execute(text(REPLICATION_LAG_QUERY)).scalar()
+        replica.update(healthy=True, lag_seconds=float(lag), error=None)
+    except Exception as e:
+        replica.update(healthy=False, lag_seconds=None, error=str(e))
+    finally:
+        replica["checked_at"] = time.time()
+        replica["lock"].release()
+
+
+def mark_down(replica, error):
+    """Takes a replica out of rotation until its next health check."""
+    replica.update(healthy=False, lag_seconds=None, error=str(error), checked_at=time.time())
+
+
+def choose_replica():
+    """The healthy replica least behind the primary, if one is within REPLICA_MAX_LAG_SECONDS."""
+    replicas = get_replicas()
+    for replica in replicas:
+        check_replica(replica)
+    in_sync = [
+        replica for replica in replicas
+        if replica["healthy"] and replica["lag_seconds"] <= REPLICA_MAX_LAG_SECONDS
+    ]
+    return min(in_sync, key=lambda replica: replica["lag_seconds"], default=None)
+
+
+@contextlib.contextmanager
+def recording_sources(sources=None):
+    """
+    Collects, into the list yielded, a {"server", "lag_seconds"} dict for every
+    query result read in the enclosed block, whether it was run or came from a cache.
+    """
+    sources = [] if sources is None else sources
+    token = read_sources.set(sources)
+    try:
+        yield sources
+    finally:
+        read_sources.reset(token)
+
+
+def note_source(source):
+    sources = read_sources.get()
+    if sources is not None and source is not None and source not in sources:
+        sources.append(source)
+
+
+def replication_note(sources):
+    """Where the results in `sources` were read from, for a chart's caption; None without replicas."""
+    if not REPLICA_URLS or not sources:
+        return None
+    replicas = sorted({source["server"] for source in sources if source["server"].startswith("replica")})
+    if not replicas:
+        return f"Read from the primary: no replica was up and within {REPLICA_MAX_LAG_SECONDS:.0f} s of it."
+    lag = max(source["lag_seconds"] for source in sources if source["server"] in replicas)
+    behind = f"{lag:.0f} s behind the primary" if lag >= 1 else "in sync with the primary"
+    return f"Read from {', '.join(replicas)}, {behind} when queried."
+
+
+@st.cache_resource
+def get_running_queries():
+    # query owner -> {thread id: DBAPI connection running a statement for that owner}
+    return {"lock": threading.Lock(), "owners": {}}
+
+
+@contextlib.contextmanager
+def owning_queries(owner):
+    """
+    Registers the statements run in the enclosed block under `owner`, a token of
+    the wait that needs their results, so cancel_queries(owner) can stop them.
+    """
+    token = query_owner.set(owner)
+    try:
+        yield
+    finally:
+        query_owner.reset(token)
+
+
+@contextlib.contextmanager
+def running_for_owner(connection):
+    """Registers the statement run on `connection` in the enclosed block with the current query owner."""
+    owner = query_owner.get()
+    if owner is None:
+        yield
+        return
+    running = get_running_queries()
+    thread_id = threading.get_ident()
+    with running["lock"]:
+        running["owners"].setdefault(owner, {})[thread_id] = connection.connection.dbapi_connection
+    try:
+        yield
+    finally:
+        with running["lock"]:
+            statements = running["owners"].get(owner, {})
+            statements.pop(thread_id, None)
+            if not statements:
+                running["owners"].pop(owner, None)
+
+
+def cancel_queries(owner):
+    """
+    Cancels every statement still running for `owner`, e.g. once Streamlit stops
+    the run or fragment waiting for them, so Postgres stops working on results
+    nobody will see and the connections go back to the pool. Statements of the
+    session's other chart blocks go on. The cancelled queries raise and cache
+    nothing. Returns how many were cancelled.
+    """
+    running = get_running_queries()
+    # The lock is held while cancelling, so a connection can't finish its statement,
+    # go back to the pool and start another owner's before it is cancelled.
+    with running["lock"]:
+        connections = list(running["owners"].get(owner, {}).values())
+        for dbapi_connection in connections:
+            # psycopg2 sends the server a cancel request for the statement in progress.
+            cancel = getattr(dbapi_connection, "cancel", None)
+            if cancel is not None:
+                try:
+                    cancel()
+                except Exception:
+                    pass
+    return len(connections)
+
+
+def read_sql(connection, query, params, source):
+    with running_for_owner(connection):
+        df = compact_frame(pd.read_sql(text(query), connection, params=params))
+    # Kept through the result cache, its snapshots and the shared backend.
+    df.attrs["source"] = source
+    note_source(source)
+    return df
+
+
+def query_replica(replica, query, params):
+    """Runs a query on a replica; returns None, marking it down, when the replica can't be reached."""
+    try:
+        connection = replica["engine"].connect()
+    except DBAPIError as e:
+        mark_down(replica, e)
+        return None
+    with connection:
+        try:
+            return read_sql(connection, query, params, {"server": replica["name"], "lag_seconds": replica["lag_seconds"]})
+        except Exception as e:
+            # Errors in the query itself, or a cancel, are the query's, not the replica's.
+            if not connection.invalidated:
+                raise
+            mark_down(replica, e)
+            return None
+
+
+def run_query(query, params=None, mirror_query=None):
+    """
+    Runs a query without caching, against the local mirror when one is configured,
+    else on a read replica when one is available, else on the primary.
+
+    Errors are raised rather than reported here, so the chart that issued the query
+    can show them in its own slot. Results are returned with compact dtypes, which is
+    also what execute_query caches.
+    """
+    if mirror_query and mirror_available():
+        try:
+            return compact_frame(query_mirror(mirror_query, params))
+        except Exception as e:
+            st.warning(f"Local mirror unavailable, querying Postgres instead: {e}")
+
+    replica = choose_replica()
+    if replica is not None:
+        df = query_replica(replica, query, params)
+        if df is not None:
+            return df
+    with get_database_connection().connect() as connection:
+        return read_sql(connection, query, params, {"server": "primary", "lag_seconds": 0.0})
+
+
+def execute_query(query, params=None, mirror_query=None):
+    """
+    run_query, cached for the life of the process and shared by every session.
+
+    The frame returned shares its data with the cache; writing to it is fine, it
+    copies the columns written to first.
+    """
+    key = (query, tuple(sorted((params or {}).items())), mirror_query)
+    df = cached_result(key, lambda: run_query(query, params, mirror_query))
+    note_source(df.attrs.get("source"))
+    return df
+
+
+def query_params(start_month=None, end_month=None, granularity="month"):
+    """
+    Bind parameters shared by the fetch_* queries.
+
+    end_month is inclusive, so end_date is the first day of the following month and
+    queries compare with `< :end_date`.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    params = {"granularity": granularity}
+    if start_month is not None:
+        params["start_date"] = to_month_start(start_month).to_pydatetime()
+    if end_month is not None:
+        params["end_date"] = (to_month_start(end_month) + pd.DateOffset(months=1)).to_pydatetime()
+    return params
+
+
+def range_filter(column, params):
+    """
+    SQL predicates restricting `column` to the date range in `params`.
+
+    The bare column is compared against the bounds, with no EXTRACT/TO_CHAR around
+    it, so an index on the timestamp can be used.
+    """
+    clauses = []
+    if "start_date" in params:
+        clauses.append(f"AND {column} >= :start_date")
+    if "end_date" in params:
+        clauses.append(f"AND {column} < :end_date")
+    return "\n".join(clauses)
+
+
+def mirror_placeholders(query):
+    """Rewrites SQLAlchemy `:name` bind placeholders into DuckDB `$name` ones."""
+    return re.sub(r"(?<![:\w]):(\w+)", r"$\1", query)
+
+
+def session_durations_query(start_month=None, end_month=None, granularity="month"):
+    """The SQL, bind parameters and mirror SQL of fetch_session_durations."""
+    params = query_params(start_month, end_month, granularity)
+    filters = range_filter("timestamp", params)
+    query = f"""
+    WITH session_durations AS (
+        SELECT 
+            properties->>'$session_id' AS session_id,
+            EXTRACT(EPOCH FROM MAX(timestamp) - MIN(timestamp)) AS session_duration_seconds,
+            MIN(timestamp) AS min_timestamp
+        FROM 
+            public.posthogevents
+        WHERE 
+            properties->>'$session_id' IS NOT NULL
+            {filters}
+        GROUP BY 
+            properties->>'$session_id'
+    )
+    SELECT 
+        EXTRACT(YEAR FROM DATE_TRUNC(:granularity, min_timestamp)) AS year,
+        EXTRACT(MONTH FROM DATE_TRUNC(:granularity, min_timestamp)) AS month,
+        FLOOR(AVG(session_duration_seconds) / 60) AS average_duration_minutes,
+        MOD(AVG(session_duration_seconds), 60) AS average_duration_seconds
+    FROM 
+        session_durations
+    GROUP BY 
+        year, month
+    ORDER BY 
+        year, month;
+    """
+    mirror_query = f"""
+    WITH session_durations AS (
+        SELECT
+            session_id,
+            epoch(MAX(timestamp) - MIN(timestamp)) AS session_duration_seconds,
+            MIN(timestamp) AS min_timestamp
+        FROM
+            posthogevents
+        WHERE
+            session_id IS NOT NULL
+            {mirror_placeholders(filters)}
+        GROUP BY
+            session_id
+    )
+    SELECT
+        year(date_trunc($granularity, min_timestamp)) AS year,
+        month(date_trunc($granularity, min_timestamp)) AS month,
+        FLOOR(AVG(session_duration_seconds) / 60) AS average_duration_minutes,
+        AVG(session_duration_seconds) % 60 AS average_duration_seconds
+    FROM
+        session_durations
+    GROUP BY
+        year, month
+    ORDER BY
+        year, month;
+    """
+    return query, params, mirror_query
+
+def fetch_session_durations(start_month=None, end_month=None, granularity="month"):
+    return execute_query(*session_durations_query(start_month, end_month, granularity))
+
+def monthly_active_user_query(start_month=None, end_month=None, granularity="month"):
+    """The SQL, bind parameters and mirror SQL of fetch_monthly_active_user."""
+    params = query_params(start_month, end_month, granularity)
+    filters = range_filter("timestamp", params)
+    query = f"""
+    WITH guest_sessions AS (
+    -- Find guest user sessions with session counts greater than 5  -2
+    SELECT
+        EXTRACT(YEAR FROM DATE_TRUNC(:granularity, timestamp)) AS year,
+        EXTRACT(MONTH FROM DATE_TRUNC(:granularity, timestamp)) AS month,
+        COUNT(properties->>'$session_id') AS session_count,
+        COALESCE(
+            properties->>'userName',
+            properties->>'loggedInUserName',
+            properties->'user'->>'name',
+            'guest_user'  -- Treat NULL users as 'guest_user'
+        ) AS user_name,
+        properties->>'$session_id' AS session_id  -- Track unique session
+    FROM 
+        public.posthogevents
+    WHERE
+        properties->>'$session_id' IS NOT NULL
+        AND (
+            COALESCE(
+                properties->>'userName', 
+                properties->>'loggedInUserName', 
+                properties->'user'->>'name'
+            ) IS NULL  -- Only for guest users
+            OR properties->>'userName' NOT IN ('La Christa Eccles', 'Winston Manuel Vijay A', 'Abarna Visvanathan', 'Winston Manuel Vijay')
+        )
+        {filters}
+    GROUP BY
+        EXTRACT(YEAR FROM DATE_TRUNC(:granularity, timestamp)), 
+        EXTRACT(MONTH FROM DATE_TRUNC(:granularity, timestamp)),
+        properties->>'$session_id', 
+        COALESCE(
+            properties->>'userName',
+            properties->>'loggedInUserName',
+            properties->'user'->>'name',
+            'guest_user'  -- Treat NULL users as 'guest_user'
+        )
+    HAVING 
+        COUNT(properties->>'$session_id') > 5  -- Only include guest sessions with more than 5 occurrences -3
+    ),
+    active_users AS (
+        -- Find active users (non-guest users)
+        SELECT
+            EXTRACT(YEAR FROM DATE_TRUNC(:granularity, timestamp)) AS year,
+            EXTRACT(MONTH FROM DATE_TRUNC(:granularity, timestamp)) AS month,
+            COUNT(DISTINCT
+                COALESCE(
+                    properties->>'userName', 
+                    properties->>'loggedInUserName', 
+                    properties->'user'->>'name',
+                    'guest_user'
+                )
+            ) AS active_user_count
+        FROM 
+            public.posthogevents
+        WHERE
+            properties->>'$session_id' IS NOT NULL
+            AND (
+                COALESCE(
+                    properties->>'userName', 
+                    properties->>'loggedInUserName', 
+                    properties->'user'->>'name'
+                ) NOT IN ('La Christa Eccles', 'Winston Manuel Vijay A', 'Abarna Visvanathan', 'Winston Manuel Vijay')
+                OR properties->>'userName' IS NULL
+            )
+            {filters}
+        GROUP BY
+            EXTRACT(YEAR FROM DATE_TRUNC(:granularity, timestamp)), 
+            EXTRACT(MONTH FROM DATE_TRUNC(:granularity, timestamp))
+    )
+
+    -- Now combine both guest_sessions and active_users
+    SELECT
+        gs.year,
+        gs.month,
+        COUNT(DISTINCT gs.session_id) AS guest_user_count,  -- Count unique guest user sessions
+        au.active_user_count
+    FROM
+        guest_sessions gs
+    JOIN
+        active_users au
+    ON
+        gs.year = au.year
+        AND gs.month = au.month
+    GROUP BY
+        gs.year,
+        gs.month,
+        au.active_user_count
+    ORDER BY 
+        gs.year, gs.month;
+    """
+    mirror_query = f"""
+    WITH named_events AS (
+        SELECT
+            year(date_trunc($granularity, timestamp)) AS year,
+            month(date_trunc($granularity, timestamp)) AS month,
+            session_id,
+            user_name,
+            COALESCE(user_name, logged_in_user_name, user_object_name) AS resolved_name
+        FROM
+            posthogevents
+        WHERE
+            session_id IS NOT NULL
+            {mirror_placeholders(filters)}
+    ),
+    guest_sessions AS (
+        SELECT
+            year,
+            month,
+            session_id
+        FROM
+            named_events
+        WHERE
+            resolved_name IS NULL
+            OR user_name NOT IN ('La Christa Eccles', 'Winston Manuel Vijay A', 'Abarna Visvanathan', 'Winston Manuel Vijay')
+        GROUP BY
+            year, month, session_id, COALESCE(resolved_name, 'guest_user')
+        HAVING
+            COUNT(session_id) > 5
+    ),
+    active_users AS (
+        SELECT
+            year,
+            month,
+            COUNT(DISTINCT COALESCE(resolved_name, 'guest_user')) AS active_user_count
+        FROM
+            named_events
+        WHERE
+            resolved_name NOT IN ('La Christa Eccles', 'Winston Manuel Vijay A', 'Abarna Visvanathan', 'Winston Manuel Vijay')
+            OR user_name IS NULL
+        GROUP BY
+            year, month
+    )
+    SELECT
+        gs.year,
+        gs.month,
+        COUNT(DISTINCT gs.session_id) AS guest_user_count,
+        au.active_user_count
+    FROM
+        guest_sessions gs
+    JOIN
+        active_users au
+    ON
+        gs.year = au.year
+        AND gs.month = au.month
+    GROUP BY
+        gs.year,
+        gs.month,
+        au.active_user_count
+    ORDER BY
+        gs.year, gs.month;
+    """
+    return query, params, mirror_query
+
+def fetch_monthly_active_user(start_month=None, end_month=None, granularity="month"):
+    return execute_query(*monthly_active_user_query(start_month, end_month, granularity))
+
+ROLLUP_REFRESH_SECONDS = 15 * 60
+ROLLUP_REBUILD_SECONDS = 24 * 60 * 60
+
+GROWTH_FILTERS = {
+    "Project": 'AND "isDeleted" = FALSE',  # Exclude deleted projects
+    "Team": "",
+    "Member": "",
+}
+
+
+def fetch_growth_counts(table, since=None):
+    """Monthly counts of rows created in `table`, limited to the month of `since` onwards when given."""
+    since_filter = 'AND "createdAt" >= :since' if since is not None else ""
+    query = f"""
+    SELECT
+        (EXTRACT(YEAR FROM "createdAt") * 100 + EXTRACT(MONTH FROM "createdAt"))::int AS month_key,
+        COUNT(*) AS new_entries
+    FROM
+        public."{table}"
+    WHERE
+        "createdAt" IS NOT NULL
+        {GROWTH_FILTERS[table]}
+        {since_filter}
+    GROUP BY
+        month_key
+    ORDER BY
+        month_key;
+    """
+    mirror_query = f"""
+    SELECT
+        CAST(year("createdAt") * 100 + month("createdAt") AS INTEGER) AS month_key,
+        COUNT(*) AS new_entries
+    FROM
+        "{table}"
+    WHERE
+        "createdAt" IS NOT NULL
+        {GROWTH_FILTERS[table]}
+        {mirror_placeholders(since_filter)}
+    GROUP BY
+        1
+    ORDER BY
+        month_key;
+    """
+    params = {"since": to_month_start(since).to_pydatetime()} if since is not None else None
+    return run_query(query, params, mirror_query)
+
+
+@st.cache_resource
+def get_rollups():
+    # "locks" holds one lock per rollup, so each rollup is refreshed by one thread at
+    # a time while other rollups refresh alongside it. "lock" only guards the dicts.
+    return {"lock": threading.Lock(), "tables": {}, "locks": {}}
+
+
+def rollup_stale(rollup):
+    return rollup is None or time.time() - rollup["refreshed_at"] >= ROLLUP_REFRESH_SECONDS
+
+
+def refresh_rollup(name, build, update):
+    """
+    Returns the process-wide rollup `name`, refreshing it at most every ROLLUP_REFRESH_SECONDS.
+
+    `build()` computes the rollup from scratch and `update(counts)` folds only the
+    newly arrived rows into an existing one. A full rebuild every
+    ROLLUP_REBUILD_SECONDS picks up edits and deletions of older rows.
+
+    While one thread refreshes a rollup, the others are served its previous
+    version; only the first build is waited for.
+    """
+    rollups = get_rollups()
+    with rollups["lock"]:
+        rollup = rollups["tables"].get(name)
+        name_lock = rollups["locks"].setdefault(name, threading.Lock())
+    if cache_only.get():
+        if rollup is None:
+            raise NotCached(name)
+    elif rollup_stale(rollup) and name_lock.acquire(blocking=rollup is None):
+        try:
+            with rollups["lock"]:
+                rollup = rollups["tables"].get(name)
+            if rollup_stale(rollup):
+                now = time.time()
+                # The rollup is as far behind as the server its last refresh read from.
+                with recording_sources() as sources:
+                    if rollup is None or rollup["counts"].empty or now - rollup["rebuilt_at"] >= ROLLUP_REBUILD_SECONDS:
+                        counts, rebuilt_at = compact_frame(build()), now
+                    else:
+                        counts, rebuilt_at = compact_frame(update(rollup["counts"])), rollup["rebuilt_at"]
+                rollup = {"counts": counts, "rebuilt_at": rebuilt_at, "refreshed_at": now, "sources": sources}
+                with rollups["lock"]:
+                    rollups["tables"][name] = rollup
+        finally:
+            name_lock.release()
+    for source in rollup.get("sources", []):
+        note_source(source)
+    return rollup["counts"]
+
+
+def update_growth_counts(table, counts):
+    """Re-queries the latest (possibly partial) month onwards and replaces those months."""
+    since = int(counts["month_key"].max())
+    fresh = fetch_growth_counts(table, since)
+    if fresh.empty:
+        return counts
+    return pd.concat([counts[counts["month_key"] < since], fresh], ignore_index=True)
+
+
+def fetch_growth_data(table, start_month=None, end_month=None, granularity="month"):
+    """
+    New, existing and total entries for `table` per period.
+
+    Existing entries are the running total of everything created in earlier months,
+    so no self-join is needed. The running total is taken over the full rollup before
+    the date range is applied, so the first visible period still counts older entries.
+    """
+    df = refresh_rollup(
+        table,
+        lambda: fetch_growth_counts(table),
+        lambda counts: update_growth_counts(table, counts)
+    ).sort_values("month_key")
+    if df.empty:
+        return pd.DataFrame(columns=["month_key", "new_entries", "existing_entries", "total_entries"])
+    df = df.assign(existing_entries=df["new_entries"].cumsum() - df["new_entries"])
+    df = df[in_month_range(df["month_key"], start_month, end_month)]
+
+    df = df.groupby(period_key(df["month_key"], granularity)).agg(
+        new_entries=("new_entries", "sum"),
+        existing_entries=("existing_entries", "first")
+    ).reset_index()
+    df["total_entries"] = df["new_entries"] + df["existing_entries"]
+    return compact_frame(df[["month_key", "new_entries", "existing_entries", "total_entries"]])
+
+
+def fetch_project_data(start_month=None, end_month=None, granularity="month"):
+    return fetch_growth_data("Project", start_month, end_month, granularity)
+
+def fetch_team_data(start_month=None, end_month=None, granularity="month"):
+    return fetch_growth_data("Team", start_month, end_month, granularity)
+
+def fetch_member_data(start_month=None, end_month=None, granularity="month"):
+    return fetch_growth_data("Member", start_month, end_month, granularity)
+
+
+def fetch_office_hours_counts(since=None):
+    """
+    Monthly office-hours link clicks per page type and ingestion month (the month of
+    the event timestamp, as ingest_key), limited to events ingested in the month of
+    `since` onwards when given.
+
+    `$sent_at` is parsed once per row in the inner query; rows without it fall back
+    to the event timestamp.
+    """
+    since_filter = "AND p.timestamp >= :since" if since is not None else ""
+    query = f"""
+    SELECT
+        (EXTRACT(YEAR FROM office_hours.sent_at) * 100 + EXTRACT(MONTH FROM office_hours.sent_at))::int AS month_key,
+        office_hours.page_type,
+        (EXTRACT(YEAR FROM office_hours.timestamp) * 100 + EXTRACT(MONTH FROM office_hours.timestamp))::int AS ingest_key,
+        COUNT(*) AS interaction_count
+    FROM (
+        SELECT
+            COALESCE(NULLIF(p.properties->>'$sent_at', '')::timestamp, p.timestamp::timestamp) AS sent_at,
+            CASE
+                WHEN p."event" = 'irl-guest-list-table-office-hours-link-clicked' THEN 'IRL Page'
+                WHEN p."event" = 'member-officehours-clicked' THEN 'Member Page'
+                WHEN p."event" = 'team-officehours-clicked' THEN 'Team Page'
+                ELSE 'Unknown'
+            END AS page_type,
+            p.timestamp
+        FROM
+            public.posthogevents p
+        WHERE
+            p."event" IN (
+                'irl-guest-list-table-office-hours-link-clicked',
+                'member-officehours-clicked',
+                'team-officehours-clicked'
+            )
+            {since_filter}
+    ) office_hours
+    GROUP BY
+        month_key,
+        office_hours.page_type,
+        ingest_key
+    ORDER BY
+        month_key, page_type;
+    """
+    mirror_query = f"""
+    SELECT
+        CAST(year(COALESCE(p.sent_at, p.timestamp::timestamp)) * 100
+             + month(COALESCE(p.sent_at, p.timestamp::timestamp)) AS INTEGER) AS month_key,
+        CASE
+            WHEN p.event = 'irl-guest-list-table-office-hours-link-clicked' THEN 'IRL Page'
+            WHEN p.event = 'member-officehours-clicked' THEN 'Member Page'
+            WHEN p.event = 'team-officehours-clicked' THEN 'Team Page'
+            ELSE 'Unknown'
+        END AS page_type,
+        CAST(year(p.timestamp) * 100 + month(p.timestamp) AS INTEGER) AS ingest_key,
+        COUNT(*) AS interaction_count
+    FROM
+        posthogevents p
+    WHERE
+        p.event IN (
+            'irl-guest-list-table-office-hours-link-clicked',
+            'member-officehours-clicked',
+            'team-officehours-clicked'
+        )
+        {mirror_placeholders(since_filter)}
+    GROUP BY
+        1, 2, 3
+    ORDER BY
+        month_key, page_type;
+    """
+    params = {"since": to_month_start(since).to_pydatetime()} if since is not None else None
+    return run_query(query, params, mirror_query)
+
+
+def update_office_hours_counts(counts):
+    """
+    Re-queries the latest ingestion month onwards and replaces those counts, so events
+    ingested since the last refresh, including ones sharing its latest timestamp,
+    are counted exactly once.
+    """
+    since = int(counts["ingest_key"].max())
+    fresh = fetch_office_hours_counts(since)
+    return pd.concat([counts[counts["ingest_key"] < since], fresh], ignore_index=True)
+
+
+def fetch_OH_data(start_month=None, end_month=None, granularity="month"):
+    df = refresh_rollup("office_hours", fetch_office_hours_counts, update_office_hours_counts)
+    if not df.empty:
+        df = df[in_month_range(df["month_key"], start_month, end_month)]
+    if df.empty:
+        return pd.DataFrame(columns=["month_key", "page_type", "interaction_count"])
+    return compact_frame(df.groupby(
+        [period_key(df["month_key"], granularity), "page_type"], as_index=False
+    )["interaction_count"].sum())
+
+
+EVENT_PARTICIPATION_LEVELS = ("period", "event")
+
+
+def event_participation_query(guest_column, start_month=None, end_month=None, granularity="month", level="period"):
+    """
+    The SQL, bind parameters and mirror SQL of fetch_event_participation_data.
+    """
+    if level not in EVENT_PARTICIPATION_LEVELS:
+        raise ValueError(f"Unsupported aggregation level: {level}")
+    params = query_params(start_month, end_month, granularity)
+    filters = range_filter('pe."startDate"', params)
+    if level == "period":
+        select_counts = "counts.type, CAST(SUM(counts.count) AS BIGINT) AS count"
+        group_by = "GROUP BY per_event.period_start, counts.type"
+        order_by = "per_event.period_start, counts.type"
+    else:
+        select_counts = "per_event.event_uid, counts.type, counts.count"
+        group_by = ""
+        order_by = "per_event.period_start, counts.type, per_event.event_uid"
+
+    query = f"""
+    WITH per_event AS (
+        SELECT
+            DATE_TRUNC(:granularity, pe."startDate") AS period_start,
+            pe."uid" AS event_uid,
+            COUNT(DISTINCT CASE WHEN eg."isHost" = true THEN eg."{guest_column}" END) AS host_count,
+            COUNT(DISTINCT CASE WHEN eg."isSpeaker" = true THEN eg."{guest_column}" END) AS speaker_count,
+            COUNT(DISTINCT CASE WHEN eg."isHost" = false AND eg."isSpeaker" = false THEN eg."{guest_column}" END) AS attendee_count
+        FROM
+            public."PLEvent" pe
+        LEFT JOIN
+            public."PLEventGuest" eg ON pe."uid" = eg."eventUid"
+        WHERE
+            pe."startDate" IS NOT NULL
+            {filters}
+        GROUP BY
+            DATE_TRUNC(:granularity, pe."startDate"),
+            pe."uid"
+    )
+    SELECT
+        (EXTRACT(YEAR FROM per_event.period_start) * 100 + EXTRACT(MONTH FROM per_event.period_start))::int AS month_key,
+        {select_counts}
+    FROM
+        per_event
+    CROSS JOIN LATERAL (
+        VALUES
+            ('Host Count', per_event.host_count),
+            ('Speaker Count', per_event.speaker_count),
+            ('Attendee Count', per_event.attendee_count)
+    ) AS counts(type, count)
+    {group_by}
+    ORDER BY
+        {order_by};
+    """
+    mirror_query = f"""
+    WITH per_event AS (
+        SELECT
+            date_trunc($granularity, pe."startDate") AS period_start,
+            pe."uid" AS event_uid,
+            COUNT(DISTINCT CASE WHEN eg."isHost" = true THEN eg."{guest_column}" END) AS host_count,
+            COUNT(DISTINCT CASE WHEN eg."isSpeaker" = true THEN eg."{guest_column}" END) AS speaker_count,
+            COUNT(DISTINCT CASE WHEN eg."isHost" = false AND eg."isSpeaker" = false THEN eg."{guest_column}" END) AS attendee_count
+        FROM
+            "PLEvent" pe
+        LEFT JOIN
+            "PLEventGuest" eg ON pe."uid" = eg."eventUid"
+        WHERE
+            pe."startDate" IS NOT NULL
+            {mirror_placeholders(filters)}
+        GROUP BY
+            1, 2
+    )
+    SELECT
+        CAST(year(per_event.period_start) * 100 + month(per_event.period_start) AS INTEGER) AS month_key,
+        {select_counts}
+    FROM
+        per_event
+    CROSS JOIN LATERAL (
+        VALUES
+            ('Host Count', per_event.host_count),
+            ('Speaker Count', per_event.speaker_count),
+            ('Attendee Count', per_event.attendee_count)
+    ) AS counts(type, count)
+    {group_by}
+    ORDER BY
+        {order_by};
+    """
+    return query, params, mirror_query
+
+
+def fetch_event_participation_data(guest_column, start_month=None, end_month=None, granularity="month", level="period"):
+    """
+    Host, speaker and attendee counts from PLEventGuest, counting distinct `guest_column` values per event.
+
+    With level="period" the per-event counts are summed per period in the database, returning one
+    row per (period, type). level="event" keeps one row per (period, event, type) for drill-downs.
+    """
+    return execute_query(*event_participation_query(guest_column, start_month, end_month, granularity, level))
+
+
+def fetch_event_participation_member_data(start_month=None, end_month=None, granularity="month", level="period"):
+    return fetch_event_participation_data("memberUid", start_month, end_month, granularity, level)
+
+def fetch_event_participation_team_data(start_month=None, end_month=None, granularity="month", level="period"):
+    return fetch_event_participation_data("teamUid", start_month, end_month, granularity, level)
+
@@ -0,0 +1,196 @@
+"""
+Renders a page's chart grid.
+
+A page is a list of chart specs, two per row. A chart either reads a worksheet
+(`worksheet` index + `build(worksheet, start_month, end_month)`), queries the
+database (`build(start_month, end_month)`), shows a static `image` or `render`s
+its own widgets. Charts with `granularity` get a month/quarter/year control whose
+value is passed to `build` as the `granularity` keyword.
+
+A chart with `series` (same arguments as `build`, without `granularity`) also
+offers a "Trends" toggle showing the growth, rolling mean and running total of
+each series it plots (see nkpi.metrics). `series` returns a frame indexed by
+month_key with one column per series.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import RerunException, StopException, add_script_run_ctx, get_script_run_ctx
+
+from nkpi.metrics import METRICS, latest_metrics
+from nkpi.months import GRANULARITIES
+from nkpi.profiling import span
+from nkpi.queries import cancel_queries, owning_queries, recording_sources, replication_note
+from nkpi.sessions import charges_cpu, record_figure
+from nkpi.sheets import SHEETS_TIMEOUT_SECONDS, get_worksheet
+
+QUERY_TIMEOUT_SECONDS = 45
+CHART_WORKERS = 8
+STOP_CHECK_SECONDS = 0.1
+
+
+@st.cache_resource
+def get_chart_pool():
+    return ThreadPoolExecutor(max_workers=CHART_WORKERS, thread_name_prefix="nkpi-chart")
+
+
+@charges_cpu
+def build_chart(ctx, owner, chart, start_month, end_month, options, part="build", sources=None):
+    """
+    Builds one chart's figure (or its `series`) on a pool thread attached to the
+    session's script context, adding where its query results were read from to
+    `sources` (see nkpi.queries.recording_sources). Its statements are registered
+    under `owner`, for wait_for to cancel.
+    """
+    add_script_run_ctx(threading.current_thread(), ctx)
+    with recording_sources(sources), owning_queries(owner):
+        if "worksheet" in chart:
+            return chart[part](get_worksheet(chart["worksheet"]), start_month, end_month, **options)
+        return chart[part](start_month, end_month, **options)
+
+
+def wait_for(future, timeout, owner=None, from_start=True):
+    """
+    future.result(timeout), checking every STOP_CHECK_SECONDS whether Streamlit is
+    stopping this run or fragment, for a newer rerun or because the session went
+    away. If it is, the statements still running for `owner` (the future's own,
+    see build_chart) are cancelled before it stops, instead of keeping their
+    connections busy until they complete. Other blocks' queries go on.
+
+    The timeout counts from when the future starts running, so a build queued
+    behind other sessions' builds on the shared pool isn't timed out before it
+    starts. Futures that never report running (such as asyncio's) need
+    from_start=False, which counts from the call instead.
+    """
+    ctx = get_script_run_ctx()
+    deadline = None if from_start else time.monotonic() + timeout
+    while True:
+        if deadline is None and (future.running() or future.done()):
+            deadline = time.monotonic() + timeout
+        wait = STOP_CHECK_SECONDS if deadline is None else max(0, min(STOP_CHECK_SECONDS, deadline - time.monotonic()))
+        try:
+            return future.result(timeout=wait)
+        except TimeoutError:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise
+        try:
+            ctx.yield_check()
+        except (RerunException, StopException):
+            future.cancel()
+            if owner is not None:
+                cancel_queries(owner)
+            raise
+
+
+def chart_controls(chart):
+    """Draws a chart's own widgets and returns their values as keyword arguments for its builder."""
+    options = {}
+    if chart.get("granularity"):
+        options["granularity"] = st.radio(
+            "Granularity",
+            list(GRANULARITIES),
+            format_func=str.capitalize,
+            horizontal=True,
+            key=f"granularity:{chart['title']}",
+            label_visibility="collapsed"
+        )
+    return options
+
+
+@st.fragment(parallel=True)
+@charges_cpu
+def chart_fragment(chart, start_month=None, end_month=None):
+    """
+    One chart block: its title, its controls and its figure.
+
+    On a full rerun every block of the page runs concurrently and is drawn as soon
+    as it is ready. Changing a block's controls reruns only that block. The figure
+    is built on the shared pool with its own deadline (SHEETS_TIMEOUT_SECONDS or
+    QUERY_TIMEOUT_SECONDS) and its own error message, so a slow or failing source
+    only affects its own block. A build that times out can only be dropped if it
+    hasn't started; one already running goes on in the background and holds its
+    pool worker until it finishes.
+    """
+    st.subheader(chart["title"])
+    if "image" in chart:
+        st.image(chart["image"], width=900)
+        return
+    if "render" in chart:
+        try:
+            chart["render"](start_month, end_month)
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
+        return
+
+    options = chart_controls(chart)
+    slot = st.empty()
+    slot.caption("Loading…")
+    timeout = SHEETS_TIMEOUT_SECONDS if "worksheet" in chart else QUERY_TIMEOUT_SECONDS
+    sources = []
+    owner = object()
+    future = get_chart_pool().submit(
+        build_chart, get_script_run_ctx(), owner, chart, start_month, end_month, options, sources=sources
+    )
+    try:
+        with span(f"build {chart['title']}"):
+            fig = wait_for(future, timeout, owner)
+    except TimeoutError:
+        future.cancel()
+        slot.warning(f"Timed out after {timeout} seconds.")
+        return
+    except Exception as e:
+        slot.error(f"An error occurred: {e}")
+        return
+    if fig is None:
+        slot.warning("No data available")
+    else:
+        record_figure(chart["title"], fig)
+        slot.plotly_chart(fig)
+        note = replication_note(sources)
+        if note:
+            st.caption(note)
+        if "series" in chart and st.toggle("Trends", key=f"trends:{chart['title']}"):
+            render_trends(chart, start_month, end_month)
+
+
+def render_trends(chart, start_month=None, end_month=None):
+    """The latest month of each of a chart's series, with its derived metrics."""
+    timeout = SHEETS_TIMEOUT_SECONDS if "worksheet" in chart else QUERY_TIMEOUT_SECONDS
+    owner = object()
+    future = get_chart_pool().submit(
+        build_chart, get_script_run_ctx(), owner, chart, start_month, end_month, {}, "series"
+    )
+    try:
+        df = latest_metrics(wait_for(future, timeout, owner))
+    except TimeoutError:
+        future.cancel()
+        st.warning(f"Timed out after {timeout} seconds.")
+        return
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+        return
+    if df.empty:
+        st.caption("No data available")
+        return
+    percent = st.column_config.NumberColumn(format="percent")
+    number = st.column_config.NumberColumn(format="localized")
+    st.dataframe(
+        df,
+        hide_index=True,
+        width="stretch",
+        column_config={
+            label: percent if metric in ("mom", "yoy") else number
+            for metric, label in METRICS.items()
+        }
+    )
+
+
+def render_charts(charts, start_month=None, end_month=None):
+    """Lays out a page's chart blocks two per row, each in its own fragment."""
+    for row in range(0, len(charts), 2):
+        for column, chart in zip(st.columns(2), charts[row:row + 2]):
+            with column:
+                chart_fragment(chart, start_month, end_month)
+
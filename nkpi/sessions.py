@@ -0,0 +1,161 @@
+"""
+Per-session resource accounting and eviction of idle sessions.
+
+Every session's reruns are recorded in a process-wide table: who is logged in, on
+which page, when they were last active, the CPU time spent on their reruns (script
+thread, chart fragments and chart builds) and the memory their page holds, i.e.
+the figures it shows and any DataFrames in its session_state.
+
+When NKPI_SESSION_IDLE_SECONDS is set (it is off by default), a session with no
+rerun for that long has its session_state emptied of everything but the login in
+SESSION_KEPT_KEYS: the frames and widget values it holds are freed, and returning
+to the tab reruns the page from its defaults without logging in again. Sessions
+whose browser went away are closed by Streamlit itself and drop out of the table
+once they are idle for that long.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+import weakref
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+SESSION_IDLE_SECONDS = float(os.getenv("NKPI_SESSION_IDLE_SECONDS", 0))
+SESSION_KEPT_KEYS = ("logged_in", "username")
+EVICTION_CHECK_SECONDS = 60
+# The trace properties holding a figure's data, see figure_bytes.
+TRACE_ARRAYS = ("x", "y", "z", "text", "hovertext", "customdata", "values", "labels")
+
+
+@st.cache_resource
+def get_session_accounts():
+    return {"lock": threading.Lock(), "sessions": {}, "checked_at": 0}
+
+
+def new_account():
+    return {
+        "username": "", "page": None, "last_active": time.time(), "reruns": 0,
+        "cpu_seconds": 0.0, "figures": {}, "frame_bytes": 0, "state": None,
+    }
+
+
+def charge(session_id, cpu_seconds):
+    """Adds to the CPU time spent on a session's reruns."""
+    accounts = get_session_accounts()
+    with accounts["lock"]:
+        accounts["sessions"].setdefault(session_id, new_account())["cpu_seconds"] += cpu_seconds
+
+
+def charges_cpu(func):
+    """Charges the CPU time func spends on the calling thread to the session it runs for."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.thread_time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            ctx = get_script_run_ctx(suppress_warning=True)
+            if ctx is not None:
+                charge(ctx.session_id, cpu_seconds=time.thread_time() - started)
+    return wrapper
+
+
+def session_frame_bytes():
+    """Memory held by the DataFrames in this session's session_state."""
+    # Only the pages import pandas; until one has, session_state can't hold a frame.
+    pd = sys.modules.get("pandas")
+    if pd is None:
+        return 0
+    return sum(
+        int(value.memory_usage(deep=True).sum())
+        for value in st.session_state.to_dict().values() if isinstance(value, pd.DataFrame)
+    )
+
+
+def record_rerun(username, page):
+    """Records a full rerun of this session and evicts idle sessions now and then."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    frame_bytes = session_frame_bytes()
+    accounts = get_session_accounts()
+    with accounts["lock"]:
+        account = accounts["sessions"].setdefault(ctx.session_id, new_account())
+        # The figures of another page are no longer held by this session.
+        if account["page"] != page:
+            account["figures"] = {}
+        account.update(
+            username=username, page=page, last_active=time.time(), frame_bytes=frame_bytes,
+            # Weak, so the account doesn't keep a closed session's state alive.
+            state=weakref.ref(ctx.session_state),
+        )
+        account["reruns"] += 1
+    evict_idle_sessions()
+
+
+def array_bytes(values):
+    if values is None or isinstance(values, str):
+        return 0
+    # Plotly keeps the columns plotted from a frame as numpy arrays; anything else
+    # is counted at 8 bytes per item.
+    return getattr(values, "nbytes", 8 * len(values))
+
+
+def figure_bytes(fig):
+    """
+    Estimates a figure's size from the data arrays of its traces, which is cheap
+    enough to do for every chart on every rerun, unlike serializing it.
+    """
+    return sum(
+        array_bytes(trace[name]) for trace in fig.data for name in TRACE_ARRAYS if name in trace
+    )
+
+
+def record_figure(title, fig):
+    """Records the size of the figure a chart block of this session shows."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    size = figure_bytes(fig)
+    accounts = get_session_accounts()
+    with accounts["lock"]:
+        account = accounts["sessions"].setdefault(ctx.session_id, new_account())
+        account["figures"][title] = size
+        account["last_active"] = time.time()
+
+
+def evict_idle_sessions():
+    """Empties the session_state of sessions idle for SESSION_IDLE_SECONDS, at most once a minute."""
+    accounts = get_session_accounts()
+    now = time.time()
+    with accounts["lock"]:
+        if not SESSION_IDLE_SECONDS or now - accounts["checked_at"] < EVICTION_CHECK_SECONDS:
+            return
+        accounts["checked_at"] = now
+        idle = [
+            session_id for session_id, account in accounts["sessions"].items()
+            if now - account["last_active"] >= SESSION_IDLE_SECONDS
+        ]
+        states = [accounts["sessions"].pop(session_id)["state"] for session_id in idle]
+
+    # An idle session runs no script, so nothing else touches its state meanwhile.
+    for state in states:
+        session_state = state() if state is not None else None
+        if session_state is None:
+            continue
+        for key in list(session_state.filtered_state):
+            if key not in SESSION_KEPT_KEYS:
+                del session_state[key]
+
+
+def session_accounts():
+    """A copy of every session's account, keyed by session id."""
+    accounts = get_session_accounts()
+    with accounts["lock"]:
+        return {
+            session_id: {**account, "figures": dict(account["figures"])}
+            for session_id, account in accounts["sessions"].items()
+        }
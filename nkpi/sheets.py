@@ -0,0 +1,306 @@
+"""
+Google Sheets access for the charts that read the nKPI spreadsheet.
+"""
+import os
+import re
+import threading
+import time
+
+import gspread
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from google.oauth2.service_account import Credentials
+from gspread.exceptions import APIError
+from gspread.utils import DateTimeOption, ValueRenderOption, fill_gaps
+
+from nkpi.cache import NotCached, cache_only, decode_rows, encode_rows, shared_get, shared_name, shared_set
+from nkpi.months import in_month_range, index_by_month, to_month_key
+
+SHEETS_TIMEOUT_SECONDS = 20
+SHEETS_EPOCH = pd.Timestamp("1899-12-30")  # Day 0 of Sheets serial date numbers
+REVISION_CHECK_SECONDS = 60
+
+# A table given as an A1 range from its header cell; the last row may be left out.
+A1_TABLE = re.compile(r"([A-Z]+)(\d+):([A-Z]+)(\d*)")
+
+
+@st.cache_resource(show_spinner=False)
+def open_spreadsheet():
+    """
+    Authorizes the service account and opens the nKPI spreadsheet.
+
+    Cached for the process, so credential setup and the spreadsheet metadata request
+    happen once instead of on every rerun.
+    """
+    scopes = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive.metadata.readonly",  # For the revision, see sheet_revision
+    ]
+    client_email = os.getenv("GOOGLE_SHEET_CLIENT_EMAIL")
+    private_key = os.getenv("GOOGLE_SHEET_PRIVATE_KEY").replace('\\n', '\n')
+    project_id = os.getenv("GOOGLE_SHEET_PROJECT_ID")
+    credentials = Credentials.from_service_account_info(
+        {
+            "type": "service_account",
+            "project_id": project_id,
+            "private_key_id": os.getenv("GOOGLE_SHEET_PRIVATE_KEY_ID"),
+            "private_key": private_key,
+            "client_email": client_email,
+            "client_id": os.getenv("GOOGLE_SHEET_CLIENT_ID"),
+            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+            "client_x509_cert_url": os.getenv("GOOGLE_SHEET_CLIENT_X509_CERT_URL")
+        },
+        scopes=scopes
+    )
+    client = gspread.authorize(credentials)
+    client.set_timeout(SHEETS_TIMEOUT_SECONDS)
+    sheet_url = os.getenv("GOOGLE_SHEET_SPREADSHEET_URL")
+    return client.open_by_url(sheet_url)
+
+
+def serial_to_timestamp(value):
+    """Converts a Sheets serial date number to a Timestamp; any other value is returned as is."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return SHEETS_EPOCH + pd.Timedelta(days=value)
+    return value
+
+
+@st.cache_resource
+def get_table_bounds():
+    # "values" holds the rows last read from each table with the revision they were
+    # read at, as tuples shared read-only by every session; "worksheets" the
+    # worksheets opened by get_worksheet, by index.
+    return {"lock": threading.Lock(), "bounds": {}, "revisions": {}, "values": {}, "worksheets": {}}
+
+
+def sheet_revision(spreadsheet):
+    """
+    The spreadsheet's Drive modifiedTime, re-read at most every REVISION_CHECK_SECONDS.
+
+    Returns None when Drive metadata can't be read, in which case tables are
+    rediscovered, and read, on every call.
+    """
+    tables = get_table_bounds()
+    with tables["lock"]:
+        revision, checked_at = tables["revisions"].get(spreadsheet.id, (None, 0))
+    if time.time() - checked_at < REVISION_CHECK_SECONDS:
+        return revision
+    try:
+        revision = spreadsheet.get_lastUpdateTime()
+    except APIError:
+        revision = None
+    with tables["lock"]:
+        tables["revisions"][spreadsheet.id] = (revision, time.time())
+    return revision
+
+
+def get_worksheet(index):
+    """
+    Worksheet `index` of the nKPI spreadsheet. Opening one fetches the spreadsheet's
+    metadata, so it is kept until the spreadsheet's revision changes instead of being
+    reopened for every chart.
+    """
+    tables = get_table_bounds()
+    if cache_only.get():
+        with tables["lock"]:
+            _, worksheet = tables["worksheets"].get(index, (None, None))
+        if worksheet is None:
+            raise NotCached(index)
+        return worksheet
+
+    spreadsheet = open_spreadsheet()
+    revision = sheet_revision(spreadsheet)
+    with tables["lock"]:
+        cached_revision, worksheet = tables["worksheets"].get(index, (None, None))
+    if worksheet is not None and revision is not None and revision == cached_revision:
+        return worksheet
+    worksheet = spreadsheet.get_worksheet(index)
+    with tables["lock"]:
+        tables["worksheets"][index] = (revision, worksheet)
+    return worksheet
+
+
+def until_blank_row(rows):
+    """The rows of a table up to, not including, its first row without any value."""
+    for index, row in enumerate(rows):
+        if all(cell == "" for cell in row):
+            return rows[:index]
+    return rows
+
+
+def read_table(worksheet, table, render_options):
+    """
+    Reads the populated rows of `table` from `worksheet`.
+
+    `table` is either the name of a named range or an A1 range starting at the
+    table's header cell. When its last row is left out ("D1:E") the table runs down
+    to its first blank row, and the bounds found are cached with the spreadsheet
+    revision, so later reads fetch exactly those rows until the sheet is edited. A
+    closed range ("D1:E20") is read as given.
+    """
+    match = A1_TABLE.fullmatch(table)
+    if match is None:
+        params = {
+            "valueRenderOption": render_options.get("value_render_option"),
+            "dateTimeRenderOption": render_options.get("date_time_render_option"),
+        }
+        values = worksheet.spreadsheet.values_get(table, params=params).get("values", [])
+        return until_blank_row(fill_gaps(values))
+    if match.group(4):
+        return worksheet.get_values(table, **render_options)
+
+    key = (worksheet.spreadsheet.id, worksheet.id, table)
+    revision = sheet_revision(worksheet.spreadsheet)
+    tables = get_table_bounds()
+    with tables["lock"]:
+        cached_revision, bounds = tables["bounds"].get(key, (None, None))
+    if revision is not None and revision == cached_revision:
+        return worksheet.get_values(bounds, **render_options)
+
+    rows = until_blank_row(worksheet.get_values(table, **render_options))
+    first_column, first_row, last_column, _ = match.groups()
+    bounds = f"{first_column}{first_row}:{last_column}{int(first_row) + max(len(rows), 1) - 1}"
+    with tables["lock"]:
+        tables["bounds"][key] = (revision, bounds)
+    return rows
+
+
+def read_rows(worksheet, data_range, typed):
+    """
+    The rows of a table as read by get_sheet_values, cached until the spreadsheet's
+    revision changes and shared with other replicas through the cache backend.
+    """
+    key = (worksheet.spreadsheet.id, worksheet.id, data_range, typed)
+    tables = get_table_bounds()
+    if cache_only.get():
+        with tables["lock"]:
+            _, rows = tables["values"].get(key, (None, None))
+        if rows is None:
+            raise NotCached(key)
+        return rows
+
+    revision = sheet_revision(worksheet.spreadsheet)
+    with tables["lock"]:
+        cached_revision, rows = tables["values"].get(key, (None, None))
+    if revision is not None and revision == cached_revision:
+        return rows
+
+    # Other replicas may already have read this revision of the table.
+    name = shared_name("sheet", (*key, revision))
+    payload = shared_get(name) if revision is not None else None
+    if payload is not None:
+        data = decode_rows(payload)
+    else:
+        if typed:
+            render_options = {
+                "value_render_option": ValueRenderOption.unformatted,
+                "date_time_render_option": DateTimeOption.serial_number,
+            }
+            data = read_table(worksheet, data_range, render_options)
+        else:
+            data = read_table(worksheet, data_range, {})
+        if revision is not None:
+            shared_set(name, encode_rows(data))
+
+    if typed:
+        rows = tuple((serial_to_timestamp(row[0]), *row[1:]) if row else () for row in data)
+    else:
+        rows = tuple(tuple(row) for row in data)
+    with tables["lock"]:
+        tables["values"][key] = (revision, rows)
+    return rows
+
+
+def get_sheet_values(worksheet, data_range, start_month=None, end_month=None, typed=True):
+    """
+    Reads a table (see read_table) and drops the rows whose first cell is a month
+    outside [start_month, end_month].
+
+    By default values are read unformatted: numbers, currency and percentages come
+    back as numbers at full precision (12.5% as 0.125), empty cells as "" and dates
+    as serial numbers, which are turned into Timestamps in the first (month) column.
+    typed=False returns the formatted strings shown in the sheet instead.
+
+    Header rows and rows whose first cell is not a month are kept as they are. Rows
+    are tuples shared with every other reader of the table and must not be modified.
+    """
+    data = list(read_rows(worksheet, data_range, typed))
+    if not data or (start_month is None and end_month is None):
+        return data
+    keys = to_month_key(pd.Series([row[0] if row else "" for row in data], dtype=object))
+    keep = keys.isna() | in_month_range(keys, start_month, end_month)
+    return [row for row, kept in zip(data, keep) if kept]
+
+
+def process_and_plot(data_range, worksheet, x_col, y_col, y_label, start_month=None, end_month=None):
+    """
+    Processes data from a given range, creates a DataFrame, and plots a bar chart.
+
+    Args:
+        data_range (str): The range of cells to extract data from.
+        worksheet: The worksheet object.
+        x_col (str): The column to use for the X-axis.
+        y_col (str): The column to use for the Y-axis.
+        y_label (str): Label for the Y-axis.
+        start_month (date, optional): First month to include.
+        end_month (date, optional): Last month to include.
+    Returns:
+        Plotly Figure: The generated bar chart.
+    """
+    data = get_sheet_values(worksheet, data_range, start_month, end_month)
+    if data and len(data[0]) >= 2:
+        df = pd.DataFrame(data[1:], columns=data[0])
+        df.rename(columns={"Month Year": "Month-Year", "Data": y_col}, inplace=True)
+        df.dropna(subset=["Month-Year", y_col], inplace=True)
+        df = index_by_month(df)
+
+        for col in df.columns:
+            if col != "Month-Year":
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        df = df[df["Value"] > 0]
+
+        bar = px.bar(
+            df,
+            x=x_col,
+            y=y_col,
+            text=y_col,
+            labels={x_col: "Month-Year", y_col: y_label},
+            height=500
+        )
+        bar.update_traces(texttemplate='%{text}', textposition='outside')
+        return bar
+    return None
+
+
+def read_series(worksheet, data_range, start_month=None, end_month=None, names=None):
+    """
+    The monthly series of a sheet table as numbers indexed by month_key, one column
+    per series. The table's first column holds the months and its header row names
+    the series, unless the table has no header and `names` are given.
+    """
+    data = get_sheet_values(worksheet, data_range, start_month, end_month)
+    if names is None:
+        names, data = (data[0][1:], data[1:]) if data else ([], [])
+    if not data:
+        return pd.DataFrame(columns=list(names), index=pd.Index([], name="month_key"), dtype=float)
+    df = index_by_month(pd.DataFrame(data, columns=["Month", *names]), "Month").drop(columns="Month")
+    return df.apply(pd.to_numeric, errors="coerce")
+
+
+def sheet_series(data_range, names=None):
+    """Series function, for a chart spec's "series", of the sheet table at data_range (see read_series)."""
+    return lambda worksheet, start_month=None, end_month=None: read_series(
+        worksheet, data_range, start_month, end_month, names
+    )
+
+
+def sheet_chart(data_range, y_label):
+    """Builder for a single "Month Year"/"Data" sheet table, plotted with process_and_plot."""
+    return lambda worksheet, start_month=None, end_month=None: process_and_plot(
+        data_range, worksheet, "Month-Year", "Value", y_label, start_month, end_month
+    )
+
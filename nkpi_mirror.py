@@ -0,0 +1,325 @@
+"""
+Incremental local DuckDB mirror of the nKPI Postgres source tables.
+
+Run `python nkpi_mirror.py` (e.g. from cron) to pull only the rows that changed
+since the last sync into the file at NKPI_MIRROR_PATH. The dashboard reads from
+the mirror instead of Postgres when NKPI_QUERY_SOURCE=mirror.
+
+A watermark can't see rows deleted from Postgres, nor a row committed after a
+sync that had already passed its watermark value, so every
+NKPI_MIRROR_RECONCILE_SECONDS (default daily) a sync also pulls each table's
+primary keys, drops the mirrored rows whose key is gone and pulls the rows whose
+key the mirror is missing.
+
+The sync writes to a copy of the mirror and swaps it in with an atomic rename,
+so the dashboard's read-only connections never wait on the writer's lock and
+never see a half-synced mirror.
+"""
+import os
+import shutil
+import time
+
+import duckdb
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, create_engine, text
+
+load_dotenv()
+
+MIRROR_PATH = os.getenv("NKPI_MIRROR_PATH", "nkpi_mirror.duckdb")
+SYNC_CHUNK_SIZE = 50000
+RECONCILE_SECONDS = float(os.getenv("NKPI_MIRROR_RECONCILE_SECONDS", 24 * 60 * 60))
+
+# For each mirrored table: the primary key used to upsert, the column used as the
+# incremental watermark, the mirrored columns with their DuckDB types, and the
+# Postgres SELECT producing them. The types are declared rather than taken from
+# the rows pulled, which can't type a column that is null in every one of them.
+# posthogevents has its JSONB properties flattened into typed columns so the
+# mirror never has to parse JSON at query time. Its watermark is the id, which
+# grows with every insert: timestamp is the client's event time, so an event
+# ingested late is stamped before rows already synced.
+MIRROR_TABLES = {
+    "posthogevents": {
+        "key": "id",
+        "watermark": "id",
+        "columns": {
+            "id": "BIGINT",
+            "event": "VARCHAR",
+            "timestamp": "TIMESTAMP WITH TIME ZONE",
+            "session_id": "VARCHAR",
+            "user_name": "VARCHAR",
+            "logged_in_user_name": "VARCHAR",
+            "user_object_name": "VARCHAR",
+            "sent_at": "TIMESTAMP",
+            "user_uid": "VARCHAR",
+            "logged_in_user_uid": "VARCHAR",
+            "uid": "VARCHAR",
+            "member_uid": "VARCHAR",
+            "current_url": "VARCHAR",
+            "pathname": "VARCHAR",
+        },
+        "select": """
+            SELECT
+                id,
+                event,
+                timestamp,
+                properties->>'$session_id' AS session_id,
+                properties->>'userName' AS user_name,
+                properties->>'loggedInUserName' AS logged_in_user_name,
+                properties->'user'->>'name' AS user_object_name,
+                NULLIF(properties->>'$sent_at', '')::timestamp AS sent_at,
+                properties->>'userUid' AS user_uid,
+                properties->>'loggedInUserUid' AS logged_in_user_uid,
+                properties->>'uid' AS uid,
+                properties->>'memberUid' AS member_uid,
+                properties->>'$current_url' AS current_url,
+                properties->>'$pathname' AS pathname
+            FROM
+                public.posthogevents
+        """,
+    },
+    "PLEvent": {
+        "key": "uid",
+        "watermark": "updatedAt",
+        "columns": {
+            "uid": "VARCHAR",
+            "startDate": "TIMESTAMP",
+            "createdAt": "TIMESTAMP",
+            "updatedAt": "TIMESTAMP",
+        },
+        "select": """
+            SELECT "uid", "startDate", "createdAt", "updatedAt"
+            FROM public."PLEvent"
+        """,
+    },
+    "PLEventGuest": {
+        "key": "uid",
+        "watermark": "updatedAt",
+        "columns": {
+            "uid": "VARCHAR",
+            "eventUid": "VARCHAR",
+            "memberUid": "VARCHAR",
+            "teamUid": "VARCHAR",
+            "isHost": "BOOLEAN",
+            "isSpeaker": "BOOLEAN",
+            "createdAt": "TIMESTAMP",
+            "updatedAt": "TIMESTAMP",
+        },
+        "select": """
+            SELECT "uid", "eventUid", "memberUid", "teamUid", "isHost", "isSpeaker", "createdAt", "updatedAt"
+            FROM public."PLEventGuest"
+        """,
+    },
+    "Project": {
+        "key": "uid",
+        "watermark": "updatedAt",
+        "columns": {
+            "uid": "VARCHAR",
+            "isDeleted": "BOOLEAN",
+            "createdAt": "TIMESTAMP",
+            "updatedAt": "TIMESTAMP",
+        },
+        "select": """
+            SELECT "uid", "isDeleted", "createdAt", "updatedAt"
+            FROM public."Project"
+        """,
+    },
+    "Team": {
+        "key": "uid",
+        "watermark": "updatedAt",
+        "columns": {
+            "uid": "VARCHAR",
+            "createdAt": "TIMESTAMP",
+            "updatedAt": "TIMESTAMP",
+        },
+        "select": """
+            SELECT "uid", "createdAt", "updatedAt"
+            FROM public."Team"
+        """,
+    },
+    "Member": {
+        "key": "uid",
+        "watermark": "updatedAt",
+        "columns": {
+            "uid": "VARCHAR",
+            "createdAt": "TIMESTAMP",
+            "updatedAt": "TIMESTAMP",
+        },
+        "select": """
+            SELECT "uid", "createdAt", "updatedAt"
+            FROM public."Member"
+        """,
+    },
+}
+
+
+def mirror_available():
+    """Return True when the dashboard is configured to read from an existing mirror file."""
+    return os.getenv("NKPI_QUERY_SOURCE") == "mirror" and os.path.exists(MIRROR_PATH)
+
+
+def query_mirror(query, params=None):
+    """
+    Run a DuckDB query against the mirror file and return a DataFrame.
+
+    DuckDB rejects parameters the statement does not use, so only the `$name`
+    placeholders present in `query` are bound.
+    """
+    if params:
+        params = {name: value for name, value in params.items() if f"${name}" in query}
+    with duckdb.connect(MIRROR_PATH, read_only=True) as connection:
+        return connection.execute(query, params or None).df()
+
+
+def table_exists(connection, table):
+    return connection.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [table]
+    ).fetchone()[0] > 0
+
+
+def get_watermark(connection, table, column):
+    return connection.execute(f'SELECT MAX("{column}") FROM "{table}"').fetchone()[0]
+
+
+def create_table(connection, table, columns):
+    """
+    Creates the mirror table with its declared column types. A table with other
+    types, such as one an older sync typed from the first rows it pulled, is
+    dropped and recreated, so its rows are pulled again in full.
+    """
+    existing = connection.execute(
+        "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ? ORDER BY ordinal_position",
+        [table],
+    ).fetchall()
+    if existing and existing != list(columns.items()):
+        connection.execute(f'DROP TABLE "{table}"')
+    definitions = ", ".join(f'"{name}" {column_type}' for name, column_type in columns.items())
+    connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({definitions})')
+
+
+def upsert_batch(connection, table, spec, batch):
+    key = spec["key"]
+    # A column null in every row of the batch comes through untyped, so each is cast.
+    values = ", ".join(f'CAST("{name}" AS {column_type})' for name, column_type in spec["columns"].items())
+    connection.register("batch", batch)
+    try:
+        connection.execute(f'DELETE FROM "{table}" WHERE "{key}" IN (SELECT "{key}" FROM batch)')
+        connection.execute(f'INSERT INTO "{table}" SELECT {values} FROM batch')
+    finally:
+        connection.unregister("batch")
+
+
+def pull_rows(engine, connection, table, query, params=None):
+    """Upserts the rows of a Postgres query into the mirror table and returns how many there were."""
+    pulled = 0
+    with engine.connect() as pg_connection:
+        for batch in pd.read_sql(query, pg_connection, params=params, chunksize=SYNC_CHUNK_SIZE):
+            upsert_batch(connection, table, MIRROR_TABLES[table], batch)
+            pulled += len(batch)
+    return pulled
+
+
+def sync_table(engine, connection, table):
+    """
+    Pulls rows changed since the table's watermark and upserts them into the mirror.
+
+    The watermark predicate is inclusive so rows sharing the last synced value are
+    re-pulled; the upsert on the primary key keeps them from being duplicated.
+
+    Returns:
+        int: The number of rows pulled from Postgres.
+    """
+    spec = MIRROR_TABLES[table]
+    create_table(connection, table, spec["columns"])
+    watermark = get_watermark(connection, table, spec["watermark"])
+    query = spec["select"]
+    params = {}
+    if watermark is not None:
+        query += f' WHERE "{spec["watermark"]}" >= :watermark'
+        params["watermark"] = watermark
+    return pull_rows(engine, connection, table, text(query), params)
+
+
+def reconcile_table(engine, connection, table):
+    """
+    Deletes the mirrored rows whose primary key no longer exists in Postgres, and
+    pulls the rows whose key is missing from the mirror.
+
+    Returns:
+        tuple: The number of rows deleted from the mirror and pulled into it.
+    """
+    spec = MIRROR_TABLES[table]
+    key = spec["key"]
+    if not table_exists(connection, table):
+        return 0, 0
+    connection.execute(f'CREATE OR REPLACE TEMP TABLE source_keys AS SELECT "{key}" FROM "{table}" LIMIT 0')
+    with engine.connect() as pg_connection:
+        query = text(f'SELECT "{key}" FROM public."{table}"')
+        for batch in pd.read_sql(query, pg_connection, chunksize=SYNC_CHUNK_SIZE):
+            connection.register("batch", batch)
+            try:
+                connection.execute("INSERT INTO source_keys SELECT * FROM batch")
+            finally:
+                connection.unregister("batch")
+    deleted = connection.execute(
+        f'DELETE FROM "{table}" WHERE "{key}" NOT IN (SELECT "{key}" FROM source_keys)'
+    ).fetchone()[0]
+    missing = connection.execute(
+        f'SELECT "{key}" FROM source_keys WHERE "{key}" NOT IN (SELECT "{key}" FROM "{table}")'
+    ).fetchall()
+    connection.execute("DROP TABLE source_keys")
+
+    query = text(spec["select"] + f' WHERE "{key}" IN :keys').bindparams(bindparam("keys", expanding=True))
+    pulled = 0
+    for start in range(0, len(missing), SYNC_CHUNK_SIZE):
+        keys = [row[0] for row in missing[start:start + SYNC_CHUNK_SIZE]]
+        pulled += pull_rows(engine, connection, table, query, {"keys": keys})
+    return deleted, pulled
+
+
+def reconcile_due(connection, table):
+    """Whether the table's keys weren't reconciled in the last RECONCILE_SECONDS."""
+    row = connection.execute("SELECT reconciled_at FROM mirror_reconciled WHERE table_name = ?", [table]).fetchone()
+    return row is None or time.time() - row[0] >= RECONCILE_SECONDS
+
+
+def mark_reconciled(connection, table):
+    connection.execute("INSERT OR REPLACE INTO mirror_reconciled VALUES (?, ?)", [table, time.time()])
+
+
+def sync_mirror(database_url=None, mirror_path=MIRROR_PATH, reconcile=None):
+    """
+    Incrementally syncs every table in MIRROR_TABLES, reconciling their keys when
+    due (or always/never with reconcile=True/False), and returns the rows pulled
+    and deleted per table.
+    """
+    engine = create_engine(database_url or os.getenv("DB_URL"))
+    partial = f"{mirror_path}.{os.getpid()}.partial"
+    if os.path.exists(mirror_path):
+        shutil.copyfile(mirror_path, partial)
+    changed = {}
+    try:
+        with duckdb.connect(partial) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS mirror_reconciled (table_name VARCHAR PRIMARY KEY, reconciled_at DOUBLE)"
+            )
+            for table in MIRROR_TABLES:
+                pulled = sync_table(engine, connection, table)
+                deleted = 0
+                if reconcile or (reconcile is None and reconcile_due(connection, table)):
+                    deleted, backfilled = reconcile_table(engine, connection, table)
+                    pulled += backfilled
+                    mark_reconciled(connection, table)
+                changed[table] = {"pulled": pulled, "deleted": deleted}
+        os.replace(partial, mirror_path)
+    finally:
+        for leftover in (partial, f"{partial}.wal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        engine.dispose()
+    return changed
+
+
+if __name__ == "__main__":
+    for table, counts in sync_mirror().items():
+        print(f"{table}: {counts['pulled']} rows pulled, {counts['deleted']} deleted")
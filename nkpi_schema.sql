@@ -0,0 +1,60 @@
+-- Source tables read by the nKPI dashboard, for seeding a local Postgres.
+-- Only the columns the fetch_* queries and nkpi_mirror.py touch are included;
+-- indexes mirror the ones the production queries are expected to use.
+
+CREATE TABLE IF NOT EXISTS public.posthogevents (
+    id BIGSERIAL PRIMARY KEY,
+    event TEXT NOT NULL,
+    timestamp TIMESTAMPTZ NOT NULL,
+    distinct_id TEXT,
+    properties JSONB NOT NULL DEFAULT '{}'::jsonb
+);
+CREATE INDEX IF NOT EXISTS posthogevents_timestamp_idx ON public.posthogevents (timestamp);
+CREATE INDEX IF NOT EXISTS posthogevents_event_timestamp_idx ON public.posthogevents (event, timestamp);
+
+CREATE TABLE IF NOT EXISTS public."Member" (
+    "uid" TEXT PRIMARY KEY,
+    "name" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "Member_createdAt_idx" ON public."Member" ("createdAt");
+
+CREATE TABLE IF NOT EXISTS public."Team" (
+    "uid" TEXT PRIMARY KEY,
+    "name" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "Team_createdAt_idx" ON public."Team" ("createdAt");
+
+CREATE TABLE IF NOT EXISTS public."Project" (
+    "uid" TEXT PRIMARY KEY,
+    "name" TEXT,
+    "isDeleted" BOOLEAN NOT NULL DEFAULT FALSE,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "Project_createdAt_idx" ON public."Project" ("createdAt");
+
+CREATE TABLE IF NOT EXISTS public."PLEvent" (
+    "uid" TEXT PRIMARY KEY,
+    "name" TEXT,
+    "startDate" TIMESTAMP(3),
+    "endDate" TIMESTAMP(3),
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "PLEvent_startDate_idx" ON public."PLEvent" ("startDate");
+
+CREATE TABLE IF NOT EXISTS public."PLEventGuest" (
+    "uid" TEXT PRIMARY KEY,
+    "eventUid" TEXT NOT NULL REFERENCES public."PLEvent" ("uid"),
+    "memberUid" TEXT,
+    "teamUid" TEXT,
+    "isHost" BOOLEAN NOT NULL DEFAULT FALSE,
+    "isSpeaker" BOOLEAN NOT NULL DEFAULT FALSE,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS "PLEventGuest_eventUid_idx" ON public."PLEventGuest" ("eventUid");
@@ -0,0 +1,178 @@
+"""
+Query-plan regression check for the dashboard's fetch_* queries.
+
+Runs EXPLAIN (ANALYZE, BUFFERS) for every query against a local, seeded Postgres
+at NKPI_PLAN_DB_URL and compares plan shape and execution time with stored
+baselines, so a query that flips to a sequential scan or slows down fails loudly.
+
+    python query_plan_check.py --seed      # on an empty database: create nkpi_schema.sql, load synthetic rows
+    python query_plan_check.py --update    # record baselines
+    python query_plan_check.py             # compare; exits 1 on any regression
+"""
+import argparse
+import difflib
+import json
+import os
+import statistics
+import sys
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+os.environ.pop("NKPI_QUERY_SOURCE", None)  # Always capture the Postgres variant of each query
+
+from nkpi import queries  # noqa: E402
+from generate_synthetic_data import generate_dataset, load_postgres  # noqa: E402
+
+BASELINE_PATH = os.getenv("NKPI_PLAN_BASELINES", "query_plan_baselines.json")
+DEFAULT_RUNS = 5
+DEFAULT_THRESHOLD = 0.5  # Allowed relative growth of the median execution time
+MIN_REGRESSION_MS = 20.0  # Ignore slowdowns smaller than this, they are timer noise
+DEFAULT_SEED_SCALE = 0.25
+
+RANGE_START = pd.Timestamp("2024-03-01")
+RANGE_END = pd.Timestamp("2024-08-01")
+INCREMENTAL_SINCE = pd.Timestamp("2024-06-01")
+
+# Each case calls a fetcher the way the dashboard does; the SQL it would run is
+# captured instead of executed. Ranged and incremental variants are included
+# because their plans should use the timestamp indexes.
+QUERY_CASES = {
+    "session_durations": lambda: queries.fetch_session_durations(),
+    "session_durations_range": lambda: queries.fetch_session_durations(RANGE_START, RANGE_END),
+    "monthly_active_user": lambda: queries.fetch_monthly_active_user(),
+    "monthly_active_user_range": lambda: queries.fetch_monthly_active_user(RANGE_START, RANGE_END),
+    "growth_project": lambda: queries.fetch_growth_counts("Project"),
+    "growth_project_incremental": lambda: queries.fetch_growth_counts("Project", INCREMENTAL_SINCE),
+    "growth_team": lambda: queries.fetch_growth_counts("Team"),
+    "growth_team_incremental": lambda: queries.fetch_growth_counts("Team", INCREMENTAL_SINCE),
+    "growth_member": lambda: queries.fetch_growth_counts("Member"),
+    "growth_member_incremental": lambda: queries.fetch_growth_counts("Member", INCREMENTAL_SINCE),
+    "office_hours": lambda: queries.fetch_office_hours_counts(),
+    "office_hours_incremental": lambda: queries.fetch_office_hours_counts(INCREMENTAL_SINCE),
+    "event_participation_member": lambda: queries.fetch_event_participation_member_data(),
+    "event_participation_member_range": lambda: queries.fetch_event_participation_member_data(RANGE_START, RANGE_END),
+    "event_participation_member_event": lambda: queries.fetch_event_participation_member_data(
+        RANGE_START, RANGE_START, level="event"
+    ),
+    "event_participation_team": lambda: queries.fetch_event_participation_team_data(),
+    "event_participation_team_range": lambda: queries.fetch_event_participation_team_data(RANGE_START, RANGE_END),
+}
+
+def seed(engine, scale):
+    """Creates the source schema and loads deterministic synthetic rows at `scale`."""
+    load_postgres(engine, generate_dataset(scale, seed=0))
+
+
+def capture_queries():
+    """Returns {case: (query, params)} by calling each fetcher with run_query swapped for a recorder."""
+    captured = {}
+    original_run_query = queries.run_query
+    try:
+        for name, call in QUERY_CASES.items():
+            recorded = []
+            queries.run_query = lambda query, params=None, mirror_query=None: recorded.append((query, params)) or pd.DataFrame()
+            call()
+            if not recorded:
+                raise RuntimeError(f"{name} did not issue a query (was it served from cache?)")
+            captured[name] = recorded[0]
+    finally:
+        queries.run_query = original_run_query
+    return captured
+
+
+def plan_shape(node, depth=0):
+    """Flattens an EXPLAIN JSON plan into indented node labels, ignoring costs and row counts."""
+    label = node["Node Type"]
+    if "Relation Name" in node:
+        label += f" on {node['Relation Name']}"
+    if "Index Name" in node:
+        label += f" using {node['Index Name']}"
+    shape = ["  " * depth + label]
+    for child in node.get("Plans", []):
+        shape.extend(plan_shape(child, depth + 1))
+    return shape
+
+
+def explain(connection, query, params, runs):
+    """
+    Runs EXPLAIN (ANALYZE, BUFFERS) `runs` times and summarizes shape, median timings and buffers.
+
+    One extra warm-up run is discarded so cold caches don't skew the median.
+    """
+    statement = text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query.strip().rstrip(";"))
+    results = [connection.execute(statement, params or {}).scalar()[0] for _ in range(runs + 1)][1:]
+    plan = results[-1]["Plan"]
+    return {
+        "shape": plan_shape(plan),
+        "execution_ms": statistics.median(result["Execution Time"] for result in results),
+        "planning_ms": statistics.median(result["Planning Time"] for result in results),
+        "shared_hit_blocks": plan.get("Shared Hit Blocks", 0),
+        "shared_read_blocks": plan.get("Shared Read Blocks", 0),
+    }
+
+
+def compare(name, baseline, current, threshold):
+    """Returns a list of human-readable regressions of `current` against `baseline`."""
+    failures = []
+    if current["shape"] != baseline["shape"]:
+        diff = "\n".join(difflib.unified_diff(baseline["shape"], current["shape"], "baseline", "current", lineterm=""))
+        failures.append(f"{name}: plan changed\n{diff}")
+    allowed_ms = max(baseline["execution_ms"] * (1 + threshold), baseline["execution_ms"] + MIN_REGRESSION_MS)
+    if current["execution_ms"] > allowed_ms:
+        failures.append(
+            f"{name}: execution time {current['execution_ms']:.1f} ms exceeds "
+            f"{allowed_ms:.1f} ms (baseline {baseline['execution_ms']:.1f} ms)"
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="create the schema and load synthetic rows first")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SEED_SCALE,
+                        help="data volume for --seed, as a multiple of production")
+    parser.add_argument("--update", action="store_true", help="overwrite the baselines with this run")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="EXPLAIN ANALYZE repetitions per query")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative runtime growth before failing")
+    parser.add_argument("--baselines", default=BASELINE_PATH, help="baseline JSON file")
+    args = parser.parse_args()
+
+    database_url = os.getenv("NKPI_PLAN_DB_URL")
+    if not database_url:
+        sys.exit("Environment variable NKPI_PLAN_DB_URL is not set.")
+    engine = create_engine(database_url)
+    if args.seed:
+        seed(engine, args.scale)
+
+    results = {}
+    with engine.connect() as connection:
+        for name, (query, params) in capture_queries().items():
+            results[name] = explain(connection, query, params, args.runs)
+            print(f"{name:40} {results[name]['execution_ms']:9.1f} ms  {results[name]['shape'][0].strip()}")
+
+    if args.update or not os.path.exists(args.baselines):
+        with open(args.baselines, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baselines written to {args.baselines}")
+        return 0
+
+    with open(args.baselines) as baseline_file:
+        baselines = json.load(baseline_file)
+    failures = []
+    for name, current in results.items():
+        if name not in baselines:
+            print(f"{name}: no baseline, run with --update to record one")
+            continue
+        failures.extend(compare(name, baselines[name], current, args.threshold))
+
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Import-time profile of the dashboard's login-page cold start.
+
+Renders the login screen with Streamlit's AppTest in a fresh interpreter under
+`python -X importtime`, reports the median cold-start time and the slowest
+top-level imports. The "eager" run imports every page module first, which is what
+a cold start cost when all pages lived in nkpi_dataset_streamlit.py, so the two
+rows show what importing pages lazily saves:
+
+    python startup_profile.py --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from nkpi_dataset_streamlit import PAGES
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "nkpi_dataset_streamlit.py")
+
+# Runs in the child interpreter: argv[1] is the app, argv[2:] are modules to import first.
+CHILD = """
+import importlib, sys, time
+started = time.perf_counter()
+for module in sys.argv[2:]:
+    importlib.import_module(module)
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+app.run()
+if app.exception:
+    sys.exit(app.exception[0].message)
+print(time.perf_counter() - started)
+"""
+
+
+def cold_start(modules):
+    """Returns (seconds, {package: cumulative import microseconds}) for one fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, APP_PATH, *modules],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # -X importtime lists children before their parent, indented two spaces per
+    # level. Walking it backwards visits parents first, so each package is charged
+    # the cumulative time of every import another package made of it.
+    imports = defaultdict(int)
+    stack = []
+    lines = [line for line in result.stderr.splitlines() if line.startswith("import time:") and "cumulative" not in line]
+    for line in reversed(lines):
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        package = name.strip().split(".")[0]
+        del stack[depth:]
+        if not stack or stack[-1] != package:
+            imports[package] += int(cumulative)
+        stack.append(package)
+    return float(result.stdout.strip().splitlines()[-1]), imports
+
+
+def profile(modules, repeat):
+    """Median cold-start seconds and the import times of the median run."""
+    runs = sorted((cold_start(modules) for _ in range(repeat)), key=lambda run: run[0])
+    return statistics.median(seconds for seconds, _ in runs), runs[len(runs) // 2][1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per scenario")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list per scenario")
+    args = parser.parse_args()
+
+    scenarios = {
+        "login (lazy pages)": [],
+        "login (eager pages)": list(PAGES.values()),
+    }
+    results = {name: profile(modules, args.repeat) for name, modules in scenarios.items()}
+
+    print(f"{'scenario':22} {'cold start ms':>14}")
+    for name, (seconds, _) in results.items():
+        print(f"{name:22} {seconds * 1000:14.0f}")
+
+    for name, (_, imports) in results.items():
+        print(f"\nSlowest imports (including the imports they make), {name}:")
+        for package, microseconds in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {package:30} {microseconds / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
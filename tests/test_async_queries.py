@@ -0,0 +1,109 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import text
+
+pytest.importorskip("asyncpg")
+pytestmark = pytest.mark.skipif(not os.getenv("DB_URL"), reason="DB_URL is not set")
+
+from nkpi import async_queries, cache, queries  # noqa: E402
+
+SLEEP_SECONDS = 0.3
+
+# Numeric and AVG columns come back from asyncpg as Decimal, which read_sql coerces to float.
+QUERY = """
+SELECT
+    CAST(:label AS TEXT) AS label,
+    CAST(1.5 AS NUMERIC) AS ratio,
+    AVG(value) AS mean,
+    CAST(SUM(value) AS BIGINT) AS total,
+    now() AS queried_at
+FROM
+    (VALUES (1), (2), (4)) AS numbers(value)
+"""
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    cache.get_result_cache.clear()
+    yield
+    cache.get_result_cache.clear()
+
+
+def running(marker):
+    """How many statements containing `marker` the server is running for other connections."""
+    with queries.get_database_connection().connect() as connection:
+        return connection.execute(
+            text("SELECT COUNT(*) FROM pg_stat_activity WHERE query LIKE :marker AND pid <> pg_backend_pid()"),
+            {"marker": f"%{marker}%"},
+        ).scalar()
+
+
+def test_results_come_back_in_order():
+    frames = async_queries.run_concurrently(
+        *[async_queries.execute_query_async("SELECT CAST(:label AS TEXT) AS label", {"label": label}) for label in "abc"]
+    )
+    assert [df.loc[0, "label"] for df in frames] == ["a", "b", "c"]
+
+
+def test_concurrency_is_bounded():
+    count = async_queries.ASYNC_CONCURRENCY + 2
+    started = time.monotonic()
+    async_queries.run_concurrently(*[
+        async_queries.run_query_async(f"SELECT pg_sleep({SLEEP_SECONDS}), CAST(:n AS TEXT) AS n", {"n": str(n)})
+        for n in range(count)
+    ])
+    elapsed = time.monotonic() - started
+
+    # Two rounds of sleeps: more than one query ran at once, but no more than ASYNC_CONCURRENCY.
+    assert 2 * SLEEP_SECONDS <= elapsed < count * SLEEP_SECONDS
+
+
+def test_cancelling_the_future_stops_the_query():
+    marker = "nkpi_async_cancel_test"
+    future = async_queries.submit(async_queries.run_query_async(f"SELECT pg_sleep(30) AS {marker}"))
+    deadline = time.monotonic() + 10
+    while not running(marker) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert running(marker) == 1
+
+    future.cancel()
+    while running(marker) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert running(marker) == 0
+
+
+def test_both_paths_return_the_same_frame():
+    sync = queries.run_query(QUERY, {"label": "sync"})
+    (concurrent,) = async_queries.run_concurrently(async_queries.run_query_async(QUERY, {"label": "async"}))
+
+    assert concurrent.dtypes.to_dict() == sync.dtypes.to_dict()
+    assert concurrent.attrs == sync.attrs
+    assert concurrent.drop(columns=["label", "queried_at"]).equals(sync.drop(columns=["label", "queried_at"]))
+
+
+def test_both_paths_share_cache_entries():
+    (df,) = async_queries.run_concurrently(async_queries.execute_query_async(QUERY, {"label": "shared"}))
+    with cache.cached_only():
+        cached = queries.execute_query(QUERY, {"label": "shared"})
+
+    assert cached.dtypes.to_dict() == df.dtypes.to_dict()
+    assert cached.attrs == df.attrs
+
+
+def test_concurrent_misses_run_one_query(monkeypatch):
+    calls = []
+    run_query_async = async_queries.run_query_async
+
+    async def counting(*args):
+        calls.append(args)
+        return await run_query_async(*args)
+
+    monkeypatch.setattr(async_queries, "run_query_async", counting)
+    frames = async_queries.run_concurrently(
+        *[async_queries.execute_query_async(QUERY, {"label": "once"}) for _ in range(4)]
+    )
+
+    assert len(calls) == 1
+    assert all(df.equals(frames[0]) for df in frames)
@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nkpi import cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    for resource in (cache.get_result_cache, cache.get_cache_backend, cache.get_backend_health):
+        resource.clear()
+    yield
+    for resource in (cache.get_result_cache, cache.get_cache_backend, cache.get_backend_health):
+        resource.clear()
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "SNAPSHOT_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def redis_url(monkeypatch):
+    """The URL of a local server speaking the Redis protocol, used as NKPI_CACHE_URL."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    monkeypatch.setattr(cache, "CACHE_URL", f"redis://{host}:{port}/0")
+    yield cache.CACHE_URL
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def memory_backend(monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_URL", "memory://")
+    return cache.get_cache_backend()
+
+
+class FailingBackend:
+    """Stands in for an unreachable Redis server."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, name):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+    def set(self, name, payload, ttl):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def not_called():
+    raise AssertionError("computed again")
+
+
+def test_hits_share_the_cached_columns():
+    key = ("hits", ())
+    first = cache.cached_result(key, lambda: pd.DataFrame({"count": [1, 2, 3], "type": ["a", "b", "c"]}))
+    second = cache.cached_result(key, not_called)
+
+    assert second.equals(first)
+    assert second is not first
+    assert np.shares_memory(first["count"].to_numpy(), second["count"].to_numpy())
+
+
+def test_caller_writes_dont_reach_the_cached_result():
+    key = ("caller writes", ())
+    df = cache.cached_result(key, lambda: pd.DataFrame({"count": [1, 2, 3], "type": ["a", "b", None]}))
+    df.loc[0, "count"] = 99
+    df["type"] = df["type"].fillna("c")
+    df.sort_values("count", inplace=True)
+
+    cached = cache.cached_result(key, not_called)
+    assert cached["count"].tolist() == [1, 2, 3]
+    assert cached["type"].tolist()[:2] == ["a", "b"]
+    assert pd.isna(cached["type"].iloc[2])
+
+
+def test_concurrent_misses_compute_once():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return pd.DataFrame({"count": [1]})
+
+    frames = []
+    threads = [
+        threading.Thread(target=lambda: frames.append(cache.cached_result(("misses", ()), compute)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [df["count"].tolist() for df in frames] == [[1]] * 4
+
+
+def test_errors_are_not_cached():
+    def failing():
+        raise ValueError("query failed")
+
+    with pytest.raises(ValueError):
+        cache.cached_result(("errors", ()), failing)
+    assert cache.cached_result(("errors", ()), lambda: pd.DataFrame({"count": [1]}))["count"].tolist() == [1]
+
+
+def test_snapshots_warm_other_workers(snapshot_dir):
+    key = ("snapshot", ())
+    cache.cached_result(key, lambda: pd.DataFrame({"count": [1, 2]}))
+    assert os.listdir(snapshot_dir) == [os.path.basename(cache.snapshot_path(key))]
+
+    # A newly started worker has an empty process cache.
+    cache.get_result_cache.clear()
+    assert cache.cached_result(key, not_called)["count"].tolist() == [1, 2]
+
+
+def test_stale_snapshots_are_recomputed_and_swapped(snapshot_dir):
+    key = ("stale", ())
+    old = cache.cached_result(key, lambda: pd.DataFrame({"count": [1]}))
+    path = cache.snapshot_path(key)
+    age(path, cache.RESULT_MAX_AGE_SECONDS + 1)
+
+    cache.get_result_cache.clear()
+    assert cache.cached_result(key, lambda: pd.DataFrame({"count": [2]}))["count"].tolist() == [2]
+    # No partial file is left behind, and the old mapping is still readable.
+    assert os.listdir(snapshot_dir) == [os.path.basename(path)]
+    assert old["count"].tolist() == [1]
+
+
+def test_unused_snapshots_are_pruned(snapshot_dir):
+    cache.cached_result(("unused", ()), lambda: pd.DataFrame({"count": [1]}))
+    unused = cache.snapshot_path(("unused", ()))
+    age(unused, 2 * cache.RESULT_MAX_AGE_SECONDS)
+
+    cache.cached_result(("used", ()), lambda: pd.DataFrame({"count": [2]}))
+    assert os.listdir(snapshot_dir) == [os.path.basename(cache.snapshot_path(("used", ())))]
+
+
+def test_results_are_shared_between_replicas_through_redis(redis_url):
+    key = ("redis", ())
+    cache.cached_result(key, lambda: pd.DataFrame({"count": [1, 2], "type": ["a", "b"]}))
+    ttl = cache.get_cache_backend().client.ttl(cache.shared_name("query", key))
+    assert 0 < ttl <= cache.RESULT_MAX_AGE_SECONDS
+
+    # Another replica has its own process cache, but the same Redis server.
+    cache.get_result_cache.clear()
+    cache.get_cache_backend.clear()
+    df = cache.cached_result(key, not_called)
+    assert df.to_dict("list") == {"count": [1, 2], "type": ["a", "b"]}
+
+
+def test_entries_of_other_cache_versions_are_not_read(redis_url, monkeypatch):
+    key = ("versioned", ())
+    cache.cached_result(key, lambda: pd.DataFrame({"count": [1]}))
+    cache.get_result_cache.clear()
+    monkeypatch.setattr(cache, "CACHE_VERSION", cache.CACHE_VERSION + 1)
+    assert cache.cached_result(key, lambda: pd.DataFrame({"count": [2]}))["count"].tolist() == [2]
+
+
+def test_memory_backend_expires_payloads():
+    backend = cache.MemoryBackend()
+    backend.set("kept", b"payload", ttl=60)
+    backend.set("expired", b"payload", ttl=0)
+    assert backend.get("kept") == b"payload"
+    assert backend.get("expired") is None
+    assert backend.get("missing") is None
+
+
+def test_results_are_shared_through_the_backend(memory_backend):
+    key = ("shared", ())
+    cache.cached_result(key, lambda: pd.DataFrame({"count": [1, 2]}))
+    # Another replica has its own process cache, but the same backend.
+    cache.get_result_cache.clear()
+    assert cache.cached_result(key, not_called)["count"].tolist() == [1, 2]
+
+
+def test_failing_backend_is_skipped_until_retry(monkeypatch):
+    backend = FailingBackend()
+    monkeypatch.setattr(cache, "get_cache_backend", lambda: backend)
+
+    df = cache.cached_result(("unreachable", ()), lambda: pd.DataFrame({"count": [1]}))
+    assert df["count"].tolist() == [1]
+    assert backend.calls == 1
+    cache.cached_result(("unreachable", (1,)), lambda: pd.DataFrame({"count": [2]}))
+    assert backend.calls == 1
+
+    cache.get_backend_health()["down_until"] = time.time() - 1
+    assert cache.shared_get("name") is None
+    assert backend.calls == 2
+
+
+def test_failing_backend_warns_each_session_once(monkeypatch):
+    warnings = []
+    session = SimpleNamespace(session_id="session")
+    monkeypatch.setattr(cache, "get_cache_backend", FailingBackend)
+    monkeypatch.setattr(cache, "get_script_run_ctx", lambda suppress_warning=False: session)
+    monkeypatch.setattr(cache.st, "warning", warnings.append)
+
+    for _ in range(2):
+        cache.get_backend_health()["down_until"] = 0
+        cache.shared_get("name")
+    assert len(warnings) == 1
+
+    session.session_id = "other session"
+    cache.get_backend_health()["down_until"] = 0
+    cache.shared_set("name", b"payload")
+    assert len(warnings) == 2
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from nkpi import frames
+
+
+def test_small_integers_are_not_narrowed_below_int32():
+    df = frames.compact_frame(pd.DataFrame({"count": [100, 120], "total": [1.0, 2.0]}))
+    assert df.dtypes.to_dict() == {"count": np.dtype("int32"), "total": np.dtype("int32")}
+    # int8 would wrap these to negative numbers.
+    assert (df["count"] + df["count"]).tolist() == [200, 240]
+
+
+def test_integers_beyond_int32_stay_int64():
+    df = frames.compact_frame(pd.DataFrame({"bytes": [1, 2**40]}))
+    assert df["bytes"].dtype == np.dtype("int64")
+    assert df["bytes"].tolist() == [1, 2**40]
+
+
+def test_missing_and_fractional_numbers_keep_their_dtype():
+    df = pd.DataFrame({
+        "ratio": [0.5, 1.0],
+        "gaps": [1.0, None],
+        "nullable": pd.array([1, None], dtype="Int64"),
+    })
+    assert frames.compact_frame(df).dtypes.equals(df.dtypes)
+
+
+def test_repeated_strings_become_categoricals():
+    df = frames.compact_frame(pd.DataFrame({"type": ["a", "a", "a", "b"], "name": ["w", "x", "y", "z"]}))
+    assert isinstance(df["type"].dtype, pd.CategoricalDtype)
+    assert df["name"].dtype != "category"
@@ -0,0 +1,201 @@
+import os
+
+import duckdb
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+import nkpi_mirror
+
+pytestmark = pytest.mark.skipif(not os.getenv("DB_URL"), reason="DB_URL is not set")
+
+# The columns of the source tables the mirror reads.
+SOURCE_SCHEMA = """
+CREATE TABLE posthogevents (
+    id BIGSERIAL PRIMARY KEY,
+    event TEXT NOT NULL,
+    timestamp TIMESTAMPTZ NOT NULL,
+    properties JSONB NOT NULL DEFAULT '{}'::jsonb
+);
+CREATE TABLE "PLEvent" (
+    "uid" TEXT PRIMARY KEY,
+    "startDate" TIMESTAMP(3),
+    "createdAt" TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL
+);
+CREATE TABLE "PLEventGuest" (
+    "uid" TEXT PRIMARY KEY,
+    "eventUid" TEXT NOT NULL,
+    "memberUid" TEXT,
+    "teamUid" TEXT,
+    "isHost" BOOLEAN NOT NULL DEFAULT FALSE,
+    "isSpeaker" BOOLEAN NOT NULL DEFAULT FALSE,
+    "createdAt" TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL
+);
+CREATE TABLE "Project" (
+    "uid" TEXT PRIMARY KEY,
+    "isDeleted" BOOLEAN NOT NULL DEFAULT FALSE,
+    "createdAt" TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL
+);
+CREATE TABLE "Team" ("uid" TEXT PRIMARY KEY, "createdAt" TIMESTAMP(3) NOT NULL, "updatedAt" TIMESTAMP(3) NOT NULL);
+CREATE TABLE "Member" ("uid" TEXT PRIMARY KEY, "createdAt" TIMESTAMP(3) NOT NULL, "updatedAt" TIMESTAMP(3) NOT NULL);
+"""
+
+SEED = """
+INSERT INTO posthogevents (event, timestamp, properties) VALUES
+    ('$pageview', '2024-01-01 10:00+00', '{"$session_id": "s1", "userName": "Ann", "$sent_at": "2024-01-01T10:00:01"}');
+INSERT INTO "PLEvent" VALUES ('e1', '2024-01-05', '2024-01-01', '2024-01-01');
+INSERT INTO "PLEventGuest" VALUES ('g1', 'e1', 'm1', 't1', TRUE, FALSE, '2024-01-01', '2024-01-01');
+INSERT INTO "Project" VALUES ('p1', FALSE, '2024-01-01', '2024-01-01');
+INSERT INTO "Team" VALUES ('t1', '2024-01-01', '2024-01-01');
+INSERT INTO "Member" VALUES ('m1', '2024-01-01', '2024-01-01');
+"""
+
+
+@pytest.fixture
+def source():
+    """An engine on a scratch database holding the source tables, dropped afterwards."""
+    server = create_engine(os.environ["DB_URL"], isolation_level="AUTOCOMMIT")
+    url = make_url(os.environ["DB_URL"]).set(database=f"nkpi_mirror_test_{os.getpid()}")
+    with server.connect() as connection:
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{url.database}"'))
+        connection.execute(text(f'CREATE DATABASE "{url.database}"'))
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(SOURCE_SCHEMA)
+        connection.exec_driver_sql(SEED)
+    yield engine
+    engine.dispose()
+    with server.connect() as connection:
+        connection.execute(text(f'DROP DATABASE "{url.database}"'))
+    server.dispose()
+
+
+def sync(source, mirror_path, reconcile=None):
+    return nkpi_mirror.sync_mirror(source.url.render_as_string(hide_password=False), str(mirror_path), reconcile)
+
+
+def read_mirror(mirror_path, query):
+    with duckdb.connect(str(mirror_path), read_only=True) as connection:
+        return connection.execute(query).df()
+
+
+def test_first_sync_copies_every_table(source, tmp_path):
+    mirror_path = tmp_path / "mirror.duckdb"
+    assert sync(source, mirror_path) == {table: {"pulled": 1, "deleted": 0} for table in nkpi_mirror.MIRROR_TABLES}
+
+    events = read_mirror(mirror_path, "SELECT * FROM posthogevents")
+    assert events.loc[0, "session_id"] == "s1"
+    assert events.loc[0, "user_name"] == "Ann"
+    assert events.loc[0, "sent_at"] == pd.Timestamp("2024-01-01 10:00:01")
+    guests = read_mirror(mirror_path, 'SELECT "memberUid", "isHost" FROM "PLEventGuest"')
+    assert guests.to_dict("records") == [{"memberUid": "m1", "isHost": True}]
+
+
+def test_later_syncs_pull_only_changed_rows(source, tmp_path):
+    mirror_path = tmp_path / "mirror.duckdb"
+    sync(source, mirror_path)
+    with source.begin() as connection:
+        connection.execute(text("""UPDATE "Member" SET "updatedAt" = '2024-02-01' WHERE "uid" = 'm1'"""))
+        connection.execute(text("""INSERT INTO "Member" VALUES ('m2', '2024-02-01', '2024-02-01')"""))
+
+    pulled = sync(source, mirror_path)
+    # The watermark is inclusive, so each table re-pulls the row it was last synced up to.
+    assert pulled["Team"]["pulled"] == 1
+    assert pulled["Member"]["pulled"] == 2
+    members = read_mirror(mirror_path, 'SELECT "uid", "updatedAt" FROM "Member" ORDER BY "uid"')
+    assert members["uid"].tolist() == ["m1", "m2"]
+    assert members["updatedAt"].tolist() == [pd.Timestamp("2024-02-01")] * 2
+
+
+def test_columns_keep_their_types_when_a_batch_has_only_nulls(source, tmp_path):
+    mirror_path = tmp_path / "mirror.duckdb"
+    # No event pulled so far has a "uid" property, so the column is null in every row.
+    sync(source, mirror_path)
+    with source.begin() as connection:
+        connection.execute(text(
+            """INSERT INTO posthogevents (event, timestamp, properties) VALUES ('$pageview', now(), '{"uid": "u1"}')"""
+        ))
+
+    sync(source, mirror_path)
+    with duckdb.connect(str(mirror_path), read_only=True) as connection:
+        assert connection.execute("SELECT uid FROM posthogevents ORDER BY id").fetchall() == [(None,), ("u1",)]
+    types = read_mirror(mirror_path, "SELECT column_name, data_type FROM information_schema.columns")
+    assert dict(zip(types["column_name"], types["data_type"]))["uid"] == "VARCHAR"
+
+
+def test_tables_typed_from_their_rows_are_pulled_again(source, tmp_path):
+    mirror_path = tmp_path / "mirror.duckdb"
+    with duckdb.connect(str(mirror_path)) as connection:
+        connection.execute('CREATE TABLE "Team" ("uid" INTEGER, "createdAt" TIMESTAMP, "updatedAt" TIMESTAMP)')
+        connection.execute("""INSERT INTO "Team" VALUES (NULL, '2025-01-01', '2025-01-01')""")
+
+    assert sync(source, mirror_path)["Team"]["pulled"] == 1
+    assert read_mirror(mirror_path, 'SELECT "uid" FROM "Team"')["uid"].tolist() == ["t1"]
+
+
+def test_events_ingested_late_are_pulled(source, tmp_path):
+    mirror_path = tmp_path / "mirror.duckdb"
+    sync(source, mirror_path)
+    # Stamped by the client before the event already mirrored, but inserted after it.
+    with source.begin() as connection:
+        connection.execute(text(
+            """INSERT INTO posthogevents (event, timestamp, properties) VALUES ('$pageview', '2023-12-31 23:00+00', '{}')"""
+        ))
+
+    sync(source, mirror_path, reconcile=False)
+    assert len(read_mirror(mirror_path, "SELECT * FROM posthogevents")) == 2
+
+
+def test_reconciling_pulls_rows_missing_from_the_mirror(source, tmp_path):
+    mirror_path = tmp_path / "mirror.duckdb"
+    with source.begin() as connection:
+        connection.execute(text(
+            """INSERT INTO posthogevents (event, timestamp, properties) VALUES ('$pageview', now(), '{}')"""
+        ))
+    sync(source, mirror_path)
+    # As if the first event had committed after a sync that already pulled the second.
+    with duckdb.connect(str(mirror_path)) as connection:
+        connection.execute("DELETE FROM posthogevents WHERE id = (SELECT MIN(id) FROM posthogevents)")
+
+    sync(source, mirror_path, reconcile=False)
+    assert len(read_mirror(mirror_path, "SELECT * FROM posthogevents")) == 1
+    assert sync(source, mirror_path, reconcile=True)["posthogevents"] == {"pulled": 2, "deleted": 0}
+    assert len(read_mirror(mirror_path, "SELECT * FROM posthogevents")) == 2
+
+
+def test_reconciling_drops_rows_deleted_from_the_source(source, tmp_path):
+    mirror_path = tmp_path / "mirror.duckdb"
+    sync(source, mirror_path)
+    with source.begin() as connection:
+        connection.execute(text("""DELETE FROM "Team" WHERE "uid" = 't1'"""))
+
+    assert sync(source, mirror_path, reconcile=False)["Team"]["deleted"] == 0
+    assert len(read_mirror(mirror_path, 'SELECT * FROM "Team"')) == 1
+    assert sync(source, mirror_path, reconcile=True)["Team"]["deleted"] == 1
+    assert len(read_mirror(mirror_path, 'SELECT * FROM "Team"')) == 0
+
+
+def test_syncs_dont_wait_for_readers(source, tmp_path):
+    mirror_path = tmp_path / "mirror.duckdb"
+    sync(source, mirror_path)
+    with source.begin() as connection:
+        connection.execute(text("""INSERT INTO "Team" VALUES ('t2', '2024-02-01', '2024-02-01')"""))
+
+    with duckdb.connect(str(mirror_path), read_only=True) as reader:
+        sync(source, mirror_path)
+        assert reader.execute('SELECT COUNT(*) FROM "Team"').fetchone() == (1,)
+    assert len(read_mirror(mirror_path, 'SELECT * FROM "Team"')) == 2
+    assert os.listdir(tmp_path) == ["mirror.duckdb"]
+
+
+def test_queries_read_the_mirror(source, tmp_path, monkeypatch):
+    mirror_path = tmp_path / "mirror.duckdb"
+    sync(source, mirror_path)
+    monkeypatch.setattr(nkpi_mirror, "MIRROR_PATH", str(mirror_path))
+
+    df = nkpi_mirror.query_mirror("SELECT COUNT(*) AS events FROM posthogevents WHERE session_id = 's1'")
+    assert df["events"].tolist() == [1]
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from nkpi import sessions
+
+
+def serialize(*args, **kwargs):
+    raise AssertionError("figure serialized")
+
+
+def test_figure_size_is_estimated_from_its_data_arrays(monkeypatch):
+    monkeypatch.setattr(go.Figure, "to_json", serialize)
+    df = pd.DataFrame({"Month": ["Jan 2024", "Feb 2024", "Mar 2024"], "Value": np.array([1, 2, 3])})
+    fig = px.bar(df, x="Month", y="Value", text="Value")
+
+    trace = fig.data[0]
+    assert sessions.figure_bytes(fig) == trace.x.nbytes + trace.y.nbytes + trace.text.nbytes
+
+
+def test_arrays_given_as_lists_are_counted_per_item():
+    fig = go.Figure(go.Scatter(x=[1, 2], y=[3, 4], text="label"))
+    assert sessions.figure_bytes(fig) == 4 * 8
@@ -0,0 +1,118 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+from gspread.exceptions import APIError
+
+from nkpi import cache, sheets
+
+TABLE = [
+    ["Month Year", "Data"],
+    ["Jan 2024", 1],
+    ["Feb 2024", 2],
+    ["", ""],
+    ["Notes", "Second table below the first"],
+]
+
+
+class FakeSpreadsheet:
+    """A spreadsheet whose revision can be changed, or made unreadable with None."""
+
+    id = "spreadsheet"
+
+    def __init__(self):
+        self.revision = "r1"
+        self.named_ranges = {}
+
+    def get_lastUpdateTime(self):
+        if self.revision is None:
+            raise APIError(SimpleNamespace(json=lambda: {"error": {"code": 403, "message": "Forbidden"}}))
+        return self.revision
+
+    def values_get(self, name, params=None):
+        return {"values": self.named_ranges[name]}
+
+
+class FakeWorksheet:
+    """Serves the rows of `cells` that an A1 range asks for, recording the ranges requested."""
+
+    id = 0
+
+    def __init__(self, spreadsheet, cells):
+        self.spreadsheet = spreadsheet
+        self.cells = cells
+        self.requested = []
+
+    def get_values(self, data_range, **render_options):
+        self.requested.append(data_range)
+        first_row, last_row = re.fullmatch(r"[A-Z]+(\d+):[A-Z]+(\d*)", data_range).groups()
+        return [list(row) for row in self.cells[int(first_row) - 1:int(last_row) if last_row else None]]
+
+
+@pytest.fixture(autouse=True)
+def empty_bounds(monkeypatch):
+    # Read the revision on every call instead of once a minute.
+    monkeypatch.setattr(sheets, "REVISION_CHECK_SECONDS", 0)
+    for resource in (sheets.get_table_bounds, cache.get_cache_backend):
+        resource.clear()
+    yield
+    for resource in (sheets.get_table_bounds, cache.get_cache_backend):
+        resource.clear()
+
+
+@pytest.fixture
+def worksheet():
+    return FakeWorksheet(FakeSpreadsheet(), [list(row) for row in TABLE])
+
+
+def test_open_range_stops_at_the_first_blank_row(worksheet):
+    assert sheets.read_table(worksheet, "D1:E", {}) == TABLE[:3]
+
+
+def test_discovered_bounds_are_read_until_the_revision_changes(worksheet):
+    sheets.read_table(worksheet, "D1:E", {})
+    assert sheets.read_table(worksheet, "D1:E", {}) == TABLE[:3]
+    assert worksheet.requested == ["D1:E", "D1:E3"]
+
+    worksheet.cells.insert(3, ["Mar 2024", 3])
+    worksheet.spreadsheet.revision = "r2"
+    assert sheets.read_table(worksheet, "D1:E", {}) == [*TABLE[:3], ["Mar 2024", 3]]
+    assert sheets.read_table(worksheet, "D1:E", {}) == [*TABLE[:3], ["Mar 2024", 3]]
+    assert worksheet.requested[2:] == ["D1:E", "D1:E4"]
+
+
+def test_tables_are_rediscovered_when_the_revision_cant_be_read(worksheet):
+    worksheet.spreadsheet.revision = None
+    sheets.read_table(worksheet, "D1:E", {})
+    sheets.read_table(worksheet, "D1:E", {})
+    assert worksheet.requested == ["D1:E", "D1:E"]
+
+
+def test_closed_ranges_are_read_as_given(worksheet):
+    assert sheets.read_table(worksheet, "D1:E2", {}) == TABLE[:2]
+    assert worksheet.requested == ["D1:E2"]
+
+
+def test_rows_are_shared_until_the_revision_changes(worksheet):
+    rows = sheets.get_sheet_values(worksheet, "D1:E", typed=False)
+    assert rows == [tuple(row) for row in TABLE[:3]]
+    assert sheets.get_sheet_values(worksheet, "D1:E", typed=False) == rows
+    assert worksheet.requested == ["D1:E"]
+
+    worksheet.spreadsheet.revision = "r2"
+    sheets.get_sheet_values(worksheet, "D1:E", typed=False)
+    assert worksheet.requested == ["D1:E", "D1:E"]
+
+
+def test_rows_are_shared_with_other_replicas(worksheet, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_URL", "memory://")
+    rows = sheets.get_sheet_values(worksheet, "D1:E")
+    # Another replica has its own table cache, but the same backend.
+    sheets.get_table_bounds.clear()
+    assert sheets.get_sheet_values(worksheet, "D1:E") == rows
+    assert worksheet.requested == ["D1:E"]
+
+
+def test_named_ranges_are_padded_and_stop_at_the_first_blank_row(worksheet):
+    worksheet.spreadsheet.named_ranges["Revenue"] = [["Month Year", "Data"], ["Jan 2024"], [], ["Notes", "x"]]
+    assert sheets.read_table(worksheet, "Revenue", {}) == [["Month Year", "Data"], ["Jan 2024", ""]]